@@ -147,27 +147,40 @@ def render_heatline_bar(label, min_val, max_val, current_val, pos, disabled=Fals
     
     st.markdown(bar_html, unsafe_allow_html=True)
 
+@st.cache_data
+def load_metrics(path_str: str, mtime_ns: int, market_key: str) -> pd.DataFrame:
+    """
+    Read one market's rows of the metrics parquet with report_date parsed (cached).
+    
+    The market_key filter is pushed down to the parquet reader (row-group
+    statistics skip other markets). Keyed by the file's mtime, so reruns reuse
+    the frame until compute rewrites the file.
+    """
+    df = pd.read_parquet(path_str, filters=[("market_key", "==", market_key)])
+    
+    # Ensure report_date is datetime/date (consistent)
+    if "report_date" in df.columns:
+        if not pd.api.types.is_datetime64_any_dtype(df["report_date"]):
+            df["report_date"] = pd.to_datetime(df["report_date"], errors="coerce")
+    return df
+
+
 # Read metrics parquet if exists
 metrics_path = paths.data / "compute" / "metrics_weekly.parquet"
 
 if metrics_path.exists():
     try:
-        df = pd.read_parquet(metrics_path)
-        
-        # Ensure report_date is datetime/date (consistent)
-        if "report_date" in df.columns:
-            if not pd.api.types.is_datetime64_any_dtype(df["report_date"]):
-                df["report_date"] = pd.to_datetime(df["report_date"], errors="coerce")
-        
-        # Create df_sorted globally (sorted by market_key and report_date)
-        df_sorted = df.sort_values(["market_key", "report_date"]).reset_index(drop=True)
+        # The page only shows the selected asset: read just its rows
+        df = load_metrics(str(metrics_path), metrics_path.stat().st_mtime_ns, selected_asset)
         
-        # Filter by market_key
-        df_filtered = df[df["market_key"] == selected_asset].copy()
+        # Filter by market_key (read-only below: the filter already returns a
+        # new frame, so no extra .copy())
+        df_filtered = df[df["market_key"] == selected_asset]
         
         if not df_filtered.empty:
-            # Get market_rows for selected asset (sorted ascending by report_date)
-            market_rows = df_sorted[df_sorted["market_key"] == selected_asset].sort_values("report_date").reset_index(drop=True)
+            # Get market_rows for selected asset (sorted ascending by report_date):
+            # one sort of the already-filtered rows, no second market_key scan
+            market_rows = df_filtered.sort_values("report_date").reset_index(drop=True)
             
             # Get available weeks for this market (sorted ascending)
             week_dates = market_rows["report_date"].dropna().unique()
@@ -433,7 +446,7 @@ if metrics_path.exists():
                 
                 # Compute scale for last 5 years per metric (up to selected_week)
                 five_years_ago = selected_week - timedelta(days=5*365) if hasattr(selected_week, '__sub__') else selected_week
-                df_5y = market_rows[(market_rows["report_date"] >= five_years_ago) & (market_rows["report_date"] <= selected_week)].copy()
+                df_5y = market_rows[(market_rows["report_date"] >= five_years_ago) & (market_rows["report_date"] <= selected_week)]
                 
                 # Calculate max_pos_5y and max_neg_5y per metric (separate extremes)
                 chg_columns = {
@@ -555,7 +568,7 @@ if metrics_path.exists():
                 st.markdown(summary_line, unsafe_allow_html=True)
                 
                 # Two-dot range line: compute shared scale from last 260 weeks
-                df_5y_net = df_filtered.sort_values("report_date", ascending=False).head(260).copy()
+                df_5y_net = df_filtered.sort_values("report_date", ascending=False).head(260)
                 scale_min = None
                 scale_max = None
                 
@@ -796,7 +809,7 @@ if metrics_path.exists():
                 """, unsafe_allow_html=True)
                 
                 # Calculate 5Y max(gross) for NC and COMM
-                df_5y_flow = df_filtered.sort_values("report_date", ascending=False).head(260).copy()
+                df_5y_flow = df_filtered.sort_values("report_date", ascending=False).head(260)
                 nc_gross_max_5y = 1.0
                 comm_gross_max_5y = 1.0
                 
@@ -1020,7 +1033,7 @@ if metrics_path.exists():
                 # Filter to only existing columns and filter by selected_week (show last 20 weeks up to selected week)
                 display_cols = [col for col in display_cols if col in market_rows.columns]
                 market_rows_up_to_selected = market_rows[market_rows["report_date"] <= selected_week].sort_values("report_date", ascending=False)
-                df_display = market_rows_up_to_selected.head(20)[display_cols].copy()
+                df_display = market_rows_up_to_selected.head(20)[display_cols]
                 st.markdown("### 📊 Дані (останні 20 тижнів)")
                 st.dataframe(df_display, use_container_width=True, hide_index=True)
                 st.caption(f"Showing last 20 rows up to {selected_week.strftime('%Y-%m-%d') if hasattr(selected_week, 'strftime') else selected_week} (total: {len(market_rows)} rows)")
@@ -2,6 +2,11 @@ from __future__ import annotations
 
 import re
 
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
 
 def normalize_contract_code(x) -> str:
     """
@@ -44,10 +49,46 @@ def is_valid_contract_code(code: str) -> bool:
     return bool(re.match(pattern, code))
 
 
+def normalize_contract_codes(values: pd.Series) -> pd.Series:
+    """
+    normalize_contract_code over a whole Series.
+    
+    String and integer columns without missing values run through Arrow string
+    kernels (no per-row Python calls); anything else falls back to the
+    per-element function, so results are always identical.
+    """
+    if values.empty or values.isna().any() or not (
+        pd.api.types.is_integer_dtype(values) or pd.api.types.is_string_dtype(values)
+    ):
+        return values.map(normalize_contract_code)
+    arr = pc.cast(pa.array(values, from_pandas=True), pa.string())
+    # Unicode case mapping differs from str.upper() in corner cases (e.g. "ß")
+    if not pc.all(pc.string_is_ascii(arr)).as_py():
+        return values.map(normalize_contract_code)
+    arr = pc.ascii_upper(pc.utf8_trim_whitespace(arr))
+    arr = pc.replace_substring_regex(arr, pattern=r"\.0$", replacement="")
+    return pd.Series(arr.to_pandas(), index=values.index, name=values.name)
 
 
+def _valid_contract_codes_arrow(values: pd.Series) -> pa.BooleanArray | None:
+    """Arrow validity for string Series (None: use the per-element fallback)."""
+    if values.empty or not pd.api.types.is_string_dtype(values) or isinstance(values.dtype, pd.CategoricalDtype):
+        return None
+    arr = pa.array(values, from_pandas=True)
+    # Same pattern with RE2 anchors; \n cannot occur in stripped codes, where
+    # Python's $ would also match before a trailing newline
+    valid = pc.match_substring_regex(arr, pattern=r"^[A-Z0-9+]{1,20}$")
+    return pc.fill_null(valid, False)
 
 
-
-
-
+def count_invalid_contract_codes(values: pd.Series) -> int:
+    """
+    Number of values failing is_valid_contract_code.
+    
+    Reduced with an Arrow kernel on the validity array, without building a
+    negated NumPy mask first.
+    """
+    valid = _valid_contract_codes_arrow(values)
+    if valid is None:
+        return len(values) - int(np.count_nonzero(values.map(is_valid_contract_code).to_numpy(dtype=bool)))
+    return len(valid) - pc.sum(valid).as_py() if len(valid) else 0
@@ -17,4 +17,6 @@ class ProjectPaths:
     @property
     def indicators(self) -> Path: return self.data / "indicators"
     @property
+    def cache(self) -> Path: return self.data / "cache"
+    @property
     def reports(self) -> Path: return self.root / "reports"
\ No newline at end of file
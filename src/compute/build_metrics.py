@@ -4,13 +4,59 @@ from __future__ import annotations
 
 import os
 import logging
+from typing import Iterable, Iterator
 
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
 
 logger = logging.getLogger("cot_mvp")
 
 
+def _rolling_by_market(values: pd.Series, market_codes: np.ndarray, how: str) -> pd.Series:
+    """
+    5Y rolling min/max per market_key (260 weeks, min_periods=52).
+    
+    Uses pandas' native grouped rolling instead of a per-group Python lambda,
+    keyed on the factorized integer market codes rather than the string keys.
+    Result is aligned back to the index of `values`.
+    """
+    rolled = values.groupby(market_codes, sort=False).rolling(window=260, min_periods=52)
+    result = getattr(rolled, how)()
+    return result.reset_index(level=0, drop=True).reindex(values.index)
+
+
+def _shift_by_market(values: pd.Series, market_codes: np.ndarray, periods: int = 1) -> pd.Series:
+    """
+    groupby("market_key").shift(periods) for a frame sorted by (market_key, report_date).
+    
+    One shifted float64 copy; rows whose source row belongs to another market
+    (code mismatch) become NaN, so no groupby index is walked.
+    """
+    arr = values.to_numpy(dtype=np.float64, na_value=np.nan)
+    out = np.full(len(arr), np.nan)
+    if periods < len(arr):
+        out[periods:] = np.where(market_codes[periods:] == market_codes[:-periods], arr[:-periods], np.nan)
+    return pd.Series(out, index=values.index)
+
+
+def _extreme_by_market(values: pd.Series, market_codes: np.ndarray, how: str) -> pd.Series:
+    """
+    groupby("market_key").transform("min"/"max") for a frame sorted by (market_key, report_date).
+    
+    One fmin/fmax.reduceat over the contiguous market runs (NaN skipped, like
+    pandas), broadcast back with np.repeat; keeps the column dtype.
+    """
+    arr = values.to_numpy()
+    if len(arr) == 0:
+        return values.copy()
+    starts = np.flatnonzero(np.r_[True, market_codes[1:] != market_codes[:-1]])
+    ufunc = np.fmin if how == "min" else np.fmax
+    extremes = ufunc.reduceat(arr, starts)
+    return pd.Series(np.repeat(extremes, np.diff(np.r_[starts, len(arr)])), index=values.index)
+
+
 def build_metrics_weekly(
     canonical: pd.DataFrame,
     market_to_category: dict[str, str],
@@ -33,10 +79,15 @@ def build_metrics_weekly(
     """
     # Filter to only markets in config
     whitelist_markets = set(market_to_category.keys())
-    df = canonical[canonical["market_key"].isin(whitelist_markets)].copy()
+    # (the boolean filter already returns a new frame, so no extra .copy())
+    df = canonical[canonical["market_key"].isin(whitelist_markets)]
     
-    # Ensure sorted by market_key and report_date for rolling calculations
-    df = df.sort_values(["market_key", "report_date"]).reset_index(drop=True)
+    # Ensure sorted by market_key and report_date for rolling calculations.
+    # Stable sort is linear on input that is already ordered (run_compute pre-sorts);
+    # df and metrics keep this row order for the rest of the function.
+    df = df.sort_values(["market_key", "report_date"], kind="stable").reset_index(drop=True)
+    # Integer market codes for the per-market shifts/diffs below
+    market_codes, _ = pd.factorize(df["market_key"])
     
     # Build identity columns
     metrics = pd.DataFrame({
@@ -86,8 +137,8 @@ def build_metrics_weekly(
             col_current = f"{group}_{side}"
             
             # Calculate min/max per market_key across all history
-            min_all = metrics.groupby("market_key")[col_current].transform("min")
-            max_all = metrics.groupby("market_key")[col_current].transform("max")
+            min_all = _extreme_by_market(metrics[col_current], market_codes, "min")
+            max_all = _extreme_by_market(metrics[col_current], market_codes, "max")
             
             metrics[f"{group}_{side}_min_all"] = min_all
             metrics[f"{group}_{side}_max_all"] = max_all
@@ -106,12 +157,8 @@ def build_metrics_weekly(
             
             # Rolling min/max per market_key (260 weeks = 5 years, backward-looking)
             # Default closed="right" includes current row in the window
-            min_5y = metrics.groupby("market_key")[col_current].transform(
-                lambda x: x.rolling(window=260, min_periods=52).min()
-            )
-            max_5y = metrics.groupby("market_key")[col_current].transform(
-                lambda x: x.rolling(window=260, min_periods=52).max()
-            )
+            min_5y = _rolling_by_market(metrics[col_current], market_codes, "min")
+            max_5y = _rolling_by_market(metrics[col_current], market_codes, "max")
             
             metrics[f"{group}_{side}_min_5y"] = min_5y
             metrics[f"{group}_{side}_max_5y"] = max_5y
@@ -128,19 +175,15 @@ def build_metrics_weekly(
     
     # Open Interest positioning metrics (ALL window and 5Y rolling window)
     # ALL window: min/max/pos across entire history per market_key
-    min_oi_all = metrics.groupby("market_key")["open_interest"].transform("min")
-    max_oi_all = metrics.groupby("market_key")["open_interest"].transform("max")
+    min_oi_all = _extreme_by_market(metrics["open_interest"], market_codes, "min")
+    max_oi_all = _extreme_by_market(metrics["open_interest"], market_codes, "max")
     diff_oi_all = max_oi_all - min_oi_all
     pos_oi_all = np.where(diff_oi_all > 0, (metrics["open_interest"] - min_oi_all) / diff_oi_all, np.nan)
     metrics["open_interest_pos_all"] = pos_oi_all
     
     # 5Y rolling window: 260 weeks, min_periods=52
-    min_oi_5y = metrics.groupby("market_key")["open_interest"].transform(
-        lambda x: x.rolling(window=260, min_periods=52).min()
-    )
-    max_oi_5y = metrics.groupby("market_key")["open_interest"].transform(
-        lambda x: x.rolling(window=260, min_periods=52).max()
-    )
+    min_oi_5y = _rolling_by_market(metrics["open_interest"], market_codes, "min")
+    max_oi_5y = _rolling_by_market(metrics["open_interest"], market_codes, "max")
     diff_oi_5y = max_oi_5y - min_oi_5y
     pos_oi_5y = np.where(
         (diff_oi_5y > 0) & min_oi_5y.notna() & max_oi_5y.notna(),
@@ -156,33 +199,21 @@ def build_metrics_weekly(
             col_current = f"{group}_{side}"
             col_chg = f"{group}_{side}_chg_1w"
             
-            # Calculate change: current - previous week (shift(1) within each market_key group)
-            prev_week = metrics.groupby("market_key")[col_current].shift(1)
+            # Calculate change: current - previous week (shift(1) within each market_key)
+            prev_week = _shift_by_market(metrics[col_current], market_codes)
             metrics[col_chg] = metrics[col_current] - prev_week
     
     # WoW change for net metrics
-    metrics["nc_net_chg_1w"] = metrics.groupby("market_key")["nc_net"].transform(
-        lambda x: x - x.shift(1)
-    )
-    metrics["comm_net_chg_1w"] = metrics.groupby("market_key")["comm_net"].transform(
-        lambda x: x - x.shift(1)
-    )
-    metrics["spec_vs_hedge_net_chg_1w"] = metrics.groupby("market_key")["spec_vs_hedge_net"].transform(
-        lambda x: x - x.shift(1)
-    )
+    metrics["nc_net_chg_1w"] = metrics["nc_net"] - _shift_by_market(metrics["nc_net"], market_codes)
+    metrics["comm_net_chg_1w"] = metrics["comm_net"] - _shift_by_market(metrics["comm_net"], market_codes)
+    metrics["spec_vs_hedge_net_chg_1w"] = metrics["spec_vs_hedge_net"] - _shift_by_market(metrics["spec_vs_hedge_net"], market_codes)
     if has_nr:
-        metrics["nr_net_chg_1w"] = metrics.groupby("market_key")["nr_net"].transform(
-            lambda x: x - x.shift(1)
-        )
-    
-    # Open Interest weekly change
-    # Ensure df is sorted by market_key and report_date for shift to work correctly
-    df = df.sort_values(["market_key", "report_date"]).reset_index(drop=True)
+        metrics["nr_net_chg_1w"] = metrics["nr_net"] - _shift_by_market(metrics["nr_net"], market_codes)
     
+    # Open Interest weekly change (df is still sorted by market_key, report_date)
     # Calculate previous week's open_interest within each market_key group (from canonical)
-    oi_prev = df.groupby("market_key")["open_interest_all"].shift(1)
-    oi_prev_numeric = pd.to_numeric(oi_prev, errors="coerce")
     oi_current_numeric = pd.to_numeric(df["open_interest_all"], errors="coerce")
+    oi_prev_numeric = _shift_by_market(oi_current_numeric, market_codes)
     
     # Calculate absolute change: current - previous week
     # Store in df first, then copy to metrics
@@ -192,13 +223,12 @@ def build_metrics_weekly(
     # Pure WoW % - no rolling, no normalization, no clipping
     # Edge cases: if prev is NaN or == 0 → pct = NaN
     df["open_interest_chg_1w_pct"] = np.where(
-        oi_prev.notna() & (oi_prev_numeric != 0),
+        oi_prev_numeric.notna() & (oi_prev_numeric != 0),
         df["open_interest_chg_1w"] / np.abs(oi_prev_numeric),
         np.nan
     )
     
-    # Copy to metrics (ensure metrics is also sorted to match df order)
-    metrics = metrics.sort_values(["market_key", "report_date"]).reset_index(drop=True)
+    # Copy to metrics (same row order as df)
     metrics["open_interest_chg_1w"] = df["open_interest_chg_1w"].values
     metrics["open_interest_chg_1w_pct"] = df["open_interest_chg_1w_pct"].values
     
@@ -243,14 +273,14 @@ def build_metrics_weekly(
     
     # WoW share change in percentage points (pp)
     # funds_gross_share_chg_1w_pp = (funds_gross_share - prev_share) * 100
-    funds_share_prev = metrics.groupby("market_key")["funds_gross_share"].shift(1)
+    funds_share_prev = _shift_by_market(metrics["funds_gross_share"], market_codes)
     metrics["funds_gross_share_chg_1w_pp"] = (metrics["funds_gross_share"] - funds_share_prev) * 100
     
-    comm_share_prev = metrics.groupby("market_key")["comm_gross_share"].shift(1)
+    comm_share_prev = _shift_by_market(metrics["comm_gross_share"], market_codes)
     metrics["comm_gross_share_chg_1w_pp"] = (metrics["comm_gross_share"] - comm_share_prev) * 100
     
     if has_nr:
-        nr_share_prev = metrics.groupby("market_key")["nr_gross_share"].shift(1)
+        nr_share_prev = _shift_by_market(metrics["nr_gross_share"], market_codes)
         metrics["nr_gross_share_chg_1w_pp"] = (metrics["nr_gross_share"] - nr_share_prev) * 100
     
     # Optional: *_gross_pct_oi (gross exposure as % of open_interest)
@@ -279,12 +309,8 @@ def build_metrics_weekly(
     metrics["open_interest_chg_1w_pct_abs"] = np.abs(metrics["open_interest_chg_1w_pct"])
     
     # Rolling 5Y min/max of abs change pct
-    min_abs_5y = metrics.groupby("market_key")["open_interest_chg_1w_pct_abs"].transform(
-        lambda x: x.rolling(window=260, min_periods=52).min()
-    )
-    max_abs_5y = metrics.groupby("market_key")["open_interest_chg_1w_pct_abs"].transform(
-        lambda x: x.rolling(window=260, min_periods=52).max()
-    )
+    min_abs_5y = _rolling_by_market(metrics["open_interest_chg_1w_pct_abs"], market_codes, "min")
+    max_abs_5y = _rolling_by_market(metrics["open_interest_chg_1w_pct_abs"], market_codes, "max")
     
     # Position: (curr - min) / (max - min) clipped 0..1
     diff_abs_5y = max_abs_5y - min_abs_5y
@@ -316,19 +342,19 @@ def build_metrics_weekly(
             )
         
         # WoW changes in percentage points
-        funds_total_pct_prev = metrics.groupby("market_key")["funds_total_pct_oi"].shift(1)
+        funds_total_pct_prev = _shift_by_market(metrics["funds_total_pct_oi"], market_codes)
         metrics["funds_total_pct_oi_chg_1w_pp"] = (metrics["funds_total_pct_oi"] - funds_total_pct_prev) * 100
         
-        comm_total_pct_prev = metrics.groupby("market_key")["comm_total_pct_oi"].shift(1)
+        comm_total_pct_prev = _shift_by_market(metrics["comm_total_pct_oi"], market_codes)
         metrics["comm_total_pct_oi_chg_1w_pp"] = (metrics["comm_total_pct_oi"] - comm_total_pct_prev) * 100
         
         if has_nr:
-            nr_total_pct_prev = metrics.groupby("market_key")["nr_total_pct_oi"].shift(1)
+            nr_total_pct_prev = _shift_by_market(metrics["nr_total_pct_oi"], market_codes)
             metrics["nr_total_pct_oi_chg_1w_pp"] = (metrics["nr_total_pct_oi"] - nr_total_pct_prev) * 100
     
     # C) Who moved (flows in %OI)
     # Use oi_prev (shift(1)) for normalization
-    oi_prev = metrics.groupby("market_key")["open_interest"].shift(1)
+    oi_prev = _shift_by_market(metrics["open_interest"], market_codes)
     oi_prev_positive = (oi_prev > 0) & oi_prev.notna()
     
     # Funds flows
@@ -370,7 +396,7 @@ def build_metrics_weekly(
     
     # D) Multi-horizon OI change (trend vs noise)
     # 4-week change
-    oi_4w_prev = metrics.groupby("market_key")["open_interest"].shift(4)
+    oi_4w_prev = _shift_by_market(metrics["open_interest"], market_codes, 4)
     oi_4w_prev_abs = np.abs(oi_4w_prev)
     metrics["oi_chg_4w_pct"] = np.where(
         oi_4w_prev.notna() & (oi_4w_prev_abs != 0),
@@ -379,7 +405,7 @@ def build_metrics_weekly(
     )
     
     # 13-week change
-    oi_13w_prev = metrics.groupby("market_key")["open_interest"].shift(13)
+    oi_13w_prev = _shift_by_market(metrics["open_interest"], market_codes, 13)
     oi_13w_prev_abs = np.abs(oi_13w_prev)
     metrics["oi_chg_13w_pct"] = np.where(
         oi_13w_prev.notna() & (oi_13w_prev_abs != 0),
@@ -434,47 +460,34 @@ def build_metrics_weekly(
             np.nan
         )
     
-    # Net side indicators
-    metrics["nc_net_side"] = np.where(
-        metrics["nc_net"] > 0, "NET_LONG",
-        np.where(metrics["nc_net"] < 0, "NET_SHORT", "FLAT")
-    )
-    metrics["comm_net_side"] = np.where(
-        metrics["comm_net"] > 0, "NET_LONG",
-        np.where(metrics["comm_net"] < 0, "NET_SHORT", "FLAT")
-    )
+    # Net side indicators (one np.select per column instead of nested np.where)
+    def net_side(net: pd.Series) -> np.ndarray:
+        return np.select([net > 0, net < 0], ["NET_LONG", "NET_SHORT"], default="FLAT")
+    
+    metrics["nc_net_side"] = net_side(metrics["nc_net"])
+    metrics["comm_net_side"] = net_side(metrics["comm_net"])
     if has_nr:
-        metrics["nr_net_side"] = np.where(
-            metrics["nr_net"] > 0, "NET_LONG",
-            np.where(metrics["nr_net"] < 0, "NET_SHORT", "FLAT")
-        )
+        metrics["nr_net_side"] = net_side(metrics["nr_net"])
     
     # Net alignment
-    metrics["net_alignment"] = np.where(
-        (metrics["nc_net_side"] == "NET_LONG") & (metrics["comm_net_side"] == "NET_LONG"), "SAME_SIDE",
-        np.where(
-            (metrics["nc_net_side"] == "NET_SHORT") & (metrics["comm_net_side"] == "NET_SHORT"), "SAME_SIDE",
-            np.where(
-                (metrics["nc_net_side"] == "NET_LONG") & (metrics["comm_net_side"] == "NET_SHORT"), "OPPOSITE_SIDE",
-                np.where(
-                    (metrics["nc_net_side"] == "NET_SHORT") & (metrics["comm_net_side"] == "NET_LONG"), "OPPOSITE_SIDE",
-                    "UNKNOWN"
-                )
-            )
-        )
+    nc_side = metrics["nc_net_side"].to_numpy()
+    comm_side = metrics["comm_net_side"].to_numpy()
+    both_known = (nc_side != "FLAT") & (comm_side != "FLAT")
+    metrics["net_alignment"] = np.select(
+        [both_known & (nc_side == comm_side), both_known],
+        ["SAME_SIDE", "OPPOSITE_SIDE"],
+        default="UNKNOWN",
     )
     
     # Magnitude gap metrics
     metrics["net_mag_gap"] = np.abs(metrics["nc_net"]) - np.abs(metrics["comm_net"])
     
     # WoW change for magnitude gap
-    metrics["net_mag_gap_chg_1w"] = metrics.groupby("market_key")["net_mag_gap"].transform(
-        lambda x: x - x.shift(1)
-    )
+    metrics["net_mag_gap_chg_1w"] = metrics["net_mag_gap"] - _shift_by_market(metrics["net_mag_gap"], market_codes)
     
     # 5Y rolling max of abs(net_mag_gap) per market_key
-    metrics["net_mag_gap_max_abs_5y"] = metrics.groupby("market_key")["net_mag_gap"].transform(
-        lambda x: x.abs().rolling(window=260, min_periods=52).max()
+    metrics["net_mag_gap_max_abs_5y"] = _rolling_by_market(
+        metrics["net_mag_gap"].abs(), market_codes, "max"
     )
     
     # Position: abs(net_mag_gap) / net_mag_gap_max_abs_5y
@@ -487,40 +500,21 @@ def build_metrics_weekly(
     
     # Net flip flags: detect sign change between current and previous week
     # Flip = (prev != 0) AND (curr != 0) AND (sign(curr) != sign(prev))
-    # If prev or curr is NaN -> flip = False
-    def compute_flip(series):
-        """Compute flip flag: True if sign changed from previous week, False otherwise."""
-        prev = series.shift(1)
-        curr = series
-        
-        # Sign function: 1 if >0, -1 if <0, 0 if ==0
-        def sign_func(val):
-            if pd.isna(val):
-                return 0
-            if val > 0:
-                return 1
-            elif val < 0:
-                return -1
-            else:
-                return 0
-        
-        prev_sign = prev.apply(sign_func)
-        curr_sign = curr.apply(sign_func)
-        
-        # Flip = (prev != 0) AND (curr != 0) AND (sign(curr) != sign(prev))
-        flip = (prev_sign != 0) & (curr_sign != 0) & (curr_sign != prev_sign)
-        
-        # Set False for NaN cases (first row, or if prev/curr is NaN)
-        flip = flip.fillna(False)
-        
-        return flip.astype(bool)
+    # If prev or curr is NaN -> sign 0 -> flip = False (also on each market's first row)
+    def compute_flip(col: str) -> np.ndarray:
+        """Flip flag per row: True if sign changed from previous week within market_key."""
+        curr = metrics[col]
+        prev = _shift_by_market(metrics[col], market_codes)
+        curr_sign = np.sign(curr.fillna(0).to_numpy(dtype=np.float64))
+        prev_sign = np.sign(prev.fillna(0).to_numpy(dtype=np.float64))
+        return (prev_sign != 0) & (curr_sign != 0) & (curr_sign != prev_sign)
     
     # Compute flip flags for each net metric
-    metrics["nc_net_flip_1w"] = metrics.groupby("market_key")["nc_net"].transform(compute_flip)
-    metrics["comm_net_flip_1w"] = metrics.groupby("market_key")["comm_net"].transform(compute_flip)
-    metrics["spec_vs_hedge_net_flip_1w"] = metrics.groupby("market_key")["spec_vs_hedge_net"].transform(compute_flip)
+    metrics["nc_net_flip_1w"] = compute_flip("nc_net")
+    metrics["comm_net_flip_1w"] = compute_flip("comm_net")
+    metrics["spec_vs_hedge_net_flip_1w"] = compute_flip("spec_vs_hedge_net")
     if has_nr:
-        metrics["nr_net_flip_1w"] = metrics.groupby("market_key")["nr_net"].transform(compute_flip)
+        metrics["nr_net_flip_1w"] = compute_flip("nr_net")
     
     # Debug: fingerprint log
     logger.info(f"[compute][debug] build_metrics.py file={os.path.abspath(__file__)}")
@@ -542,3 +536,39 @@ def build_metrics_weekly(
     assert "open_interest_chg_1w_pct" in metrics.columns, "missing open_interest_chg_1w_pct in final metrics"
     
     return metrics
+
+
+def stream_canonical(path, columns: list[str] | None = None, batch_size: int = 128_000) -> Iterator[pa.RecordBatch]:
+    """Iterate canonical parquet as record batches (only `columns` are decoded)."""
+    parquet_file = pq.ParquetFile(path)
+    yield from parquet_file.iter_batches(batch_size=batch_size, columns=columns)
+
+
+def build_metrics_weekly_streaming(
+    batches: Iterable[pa.RecordBatch],
+    market_to_category: dict[str, str],
+    market_to_contract: dict[str, str],
+) -> Iterator[pd.DataFrame]:
+    """
+    Build metrics per market_key from a stream of canonical record batches.
+    
+    Every metric is computed within a single market, but the ALL-window columns
+    need the market's full history, so rows are bucketed per whitelisted market
+    and one metrics frame is yielded per market (sorted by market_key). Peak
+    memory is the projected canonical rows plus one market's metrics instead of
+    the full metrics table.
+    """
+    whitelist_markets = set(market_to_category.keys())
+    buckets: dict[str, list[pd.DataFrame]] = {}
+    
+    for batch in batches:
+        chunk = batch.to_pandas()
+        chunk = chunk[chunk["market_key"].isin(whitelist_markets)]
+        # Same report_date dtype as the in-memory path in run_compute
+        chunk = chunk.assign(report_date=pd.to_datetime(chunk["report_date"]))
+        for market_key, part in chunk.groupby("market_key", sort=False):
+            buckets.setdefault(market_key, []).append(part)
+    
+    for market_key in sorted(buckets):
+        market_df = pd.concat(buckets.pop(market_key), ignore_index=True)
+        yield build_metrics_weekly(market_df, market_to_category, market_to_contract)
@@ -0,0 +1,62 @@
+"""Compile markets.yaml into a binary (pickle) config for fast CLI startup."""
+
+from __future__ import annotations
+
+import argparse
+import pickle
+from pathlib import Path
+
+from src.common.logging import setup_logging
+from src.common.paths import ProjectPaths
+
+
+def _load_yaml(path: Path) -> dict:
+    """Parse YAML from raw bytes with the libyaml loader when available."""
+    import yaml
+    try:
+        from yaml import CSafeLoader as Loader
+    except ImportError:
+        from yaml import SafeLoader as Loader
+    return yaml.load(path.read_bytes(), Loader=Loader)
+
+
+def compiled_path(markets_path: Path) -> Path:
+    """Path of the compiled config next to the YAML (markets.yaml -> markets.pkl)."""
+    return markets_path.with_suffix(".pkl")
+
+
+def compile_markets(markets_path: Path) -> Path:
+    """Parse markets.yaml once and write it as pickle. Returns the output path."""
+    cfg = _load_yaml(markets_path)
+    out_path = compiled_path(markets_path)
+    with out_path.open("wb") as f:
+        pickle.dump(cfg, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return out_path
+
+
+def load_markets_config(markets_path: Path) -> dict:
+    """
+    Load markets config, preferring the compiled pickle when it is not older
+    than the YAML (YAML stays the source of truth).
+    """
+    pkl_path = compiled_path(markets_path)
+    if pkl_path.exists() and pkl_path.stat().st_mtime >= markets_path.stat().st_mtime:
+        with pkl_path.open("rb") as f:
+            return pickle.load(f)
+    return _load_yaml(markets_path)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--root", default=".")
+    parser.add_argument("--log-level", default="INFO")
+    args = parser.parse_args()
+
+    logger = setup_logging(args.log_level)
+    paths = ProjectPaths(Path(args.root).resolve())
+    out_path = compile_markets(paths.configs / "markets.yaml")
+    logger.info(f"[compute] wrote {out_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,39 +3,141 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
 import os
+import shutil
 import sys
 from pathlib import Path
 
-import yaml
-import pandas as pd
-
 from src.common.paths import ProjectPaths
 from src.common.logging import setup_logging
-from src.compute.build_metrics import build_metrics_weekly
-from src.compute.validations import (
-    validate_canonical_exists,
-    validate_required_columns,
-    validate_output_rows,
-    validate_uniqueness,
-    validate_pos_all,
-    validate_pos_5y,
-    validate_max_min_all,
-    validate_max_min_5y,
-    validate_chg_1w,
-    validate_net_metrics,
-    validate_oi_metrics,
-    validate_exposure_shares,
-    validate_oi_v1_metrics,
+
+# pandas/pyarrow/yaml and the compute modules are imported inside the functions
+# that need them, so `--help` and argument errors never pay for them
+
+REQUIRED_CANONICAL_COLS = ("market_key", "report_date", "contract_code", "comm_long", "comm_short", "nc_long", "nc_short")
+# Columns build_metrics_weekly reads (NR columns are optional)
+METRICS_INPUT_COLS = REQUIRED_CANONICAL_COLS + ("open_interest_all", "nr_long", "nr_short")
+
+# Zstd level 3 is on par with Snappy for speed but noticeably smaller on this
+# numeric/categorical mix; larger row groups keep downstream reads streaming
+PARQUET_WRITE_OPTIONS = dict(
+    compression="zstd",
+    compression_level=3,
+    row_group_size=128_000,
+    use_dictionary=True,
 )
 
+# Inputs that determine metrics_weekly besides the canonical/config files
+COMPUTE_SOURCES = [Path(__file__).name, "build_metrics.py", "compile_markets.py", "validations.py"]
+
+
+def metrics_cache_key(canonical_path: Path, markets_path: Path, streaming: bool) -> str:
+    """
+    Cache key for metrics_weekly: canonical (size + mtime), markets.yaml bytes,
+    compute source files and the compute mode.
+    """
+    h = hashlib.blake2b(digest_size=12)
+    st = canonical_path.stat()
+    h.update(f"{st.st_size}|{st.st_mtime_ns}|streaming={streaming}".encode())
+    h.update(markets_path.read_bytes())
+    src_dir = Path(__file__).resolve().parent
+    for name in COMPUTE_SOURCES:
+        h.update((src_dir / name).read_bytes())
+    return h.hexdigest()
+
+
+def store_metrics_cache(output_path: Path, cache_path: Path) -> None:
+    """Copy the fresh output into the cache, dropping older cache entries."""
+    for old in output_path.parent.glob("metrics_weekly.*.parquet"):
+        if old != cache_path:
+            old.unlink(missing_ok=True)
+    shutil.copyfile(output_path, cache_path)
+
+
+def run_streaming(canonical_path: Path, market_to_category: dict, market_to_contract: dict, output_path: Path, logger) -> None:
+    """
+    Streaming compute: read canonical by record batch (projected columns only),
+    build + validate metrics one market at a time and append them to the output.
+    
+    Output is written to a temp file and only moved into place if all
+    validations pass (same contract as the in-memory path).
+    """
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    from src.compute.build_metrics import build_metrics_weekly_streaming, stream_canonical
+    from src.compute.validations import validate_required_columns, validate_all
+    
+    schema_names = pq.ParquetFile(canonical_path).schema_arrow.names
+    col_errors = validate_required_columns(pd.DataFrame(columns=schema_names), REQUIRED_CANONICAL_COLS)
+    if col_errors:
+        for err in col_errors:
+            logger.error(f"[compute] {err}")
+        raise SystemExit("Canonical missing required columns")
+    
+    columns = [c for c in METRICS_INPUT_COLS if c in schema_names]
+    batches = stream_canonical(canonical_path, columns)
+    
+    tmp_path = output_path.with_suffix(".parquet.tmp")
+    writer = None
+    errors = []
+    total_rows = 0
+    try:
+        for market_metrics in build_metrics_weekly_streaming(batches, market_to_category, market_to_contract):
+            errors.extend(validate_all(market_metrics))
+            total_rows += len(market_metrics)
+            
+            table = pa.Table.from_pandas(market_metrics, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(
+                    tmp_path,
+                    table.schema,
+                    compression=PARQUET_WRITE_OPTIONS["compression"],
+                    compression_level=PARQUET_WRITE_OPTIONS["compression_level"],
+                    use_dictionary=PARQUET_WRITE_OPTIONS["use_dictionary"],
+                )
+            else:
+                table = table.cast(writer.schema)
+            writer.write_table(table, row_group_size=PARQUET_WRITE_OPTIONS["row_group_size"])
+            logger.info(f"[compute] streamed {market_metrics['market_key'].iloc[0]} rows={len(market_metrics)}")
+    finally:
+        if writer is not None:
+            writer.close()
+    
+    if total_rows == 0:
+        errors.append("Output has 0 rows")
+    if errors:
+        tmp_path.unlink(missing_ok=True)
+        for err in errors:
+            logger.error(f"[compute] VALIDATION FAILED: {err}")
+        raise SystemExit("Compute validations failed")
+    
+    os.replace(tmp_path, output_path)
+    logger.info(f"[compute] wrote {output_path} rows={total_rows}")
+
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--root", default=".")
     parser.add_argument("--log-level", default="INFO")
+    parser.add_argument("--streaming", action="store_true", help="Build and validate metrics one market at a time")
+    parser.add_argument("--no-cache", action="store_true", help="Always rebuild metrics, ignoring cached output")
+    parser.add_argument("--validate-only", action="store_true", help="Validate the existing metrics_weekly.parquet by streaming it")
     args = parser.parse_args()
     
+    import pandas as pd
+    
+    from src.compute.build_metrics import build_metrics_weekly
+    from src.compute.compile_markets import load_markets_config
+    from src.compute.validations import (
+        validate_canonical_exists,
+        validate_required_columns,
+        validate_all,
+        validate_parquet,
+    )
+    
     logger = setup_logging(args.log_level)
     
     # Debug: check sys.path to detect shadowing
@@ -47,77 +149,112 @@ def main():
     canonical_path = paths.canonical / "cot_weekly_canonical_full.parquet"
     validate_canonical_exists(str(canonical_path))
     
+    # Output location
+    output_dir = paths.data / "compute"
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    output_path = output_dir / "metrics_weekly.parquet"
+    # Content hash of the last in-memory write; dropped whenever the output is
+    # produced another way so it never vouches for a different file
+    hash_path = output_path.with_suffix(".parquet.hash")
+    
+    if args.validate_only:
+        if not output_path.exists():
+            raise SystemExit(f"metrics_weekly not found: {output_path}")
+        logger.info(f"[compute] validating {output_path} (streaming by market)")
+        errors = validate_parquet(str(output_path))
+        if errors:
+            for err in errors:
+                logger.error(f"[compute] VALIDATION FAILED: {err}")
+            raise SystemExit("Compute validations failed")
+        logger.info("[compute] DONE")
+        return
+    
+    # Reuse cached output if canonical, config and compute code are unchanged
+    markets_path = paths.configs / "markets.yaml"
+    cache_path = output_dir / f"metrics_weekly.{metrics_cache_key(canonical_path, markets_path, args.streaming)}.parquet"
+    if not args.no_cache and cache_path.exists():
+        shutil.copyfile(cache_path, output_path)
+        hash_path.unlink(missing_ok=True)
+        logger.info(f"[compute] inputs unchanged, reused cached metrics: {cache_path.name}")
+        logger.info("[compute] DONE")
+        return
+    
+    # Read markets.yaml
+    logger.info(f"[compute] reading markets config: {markets_path}")
+    cfg = load_markets_config(markets_path)
+    
+    # Build market mappings (single pass over config rows)
+    rows = [
+        (m.get("market_key") or m.get("key"), m.get("category"), m.get("contract_code"))
+        for m in cfg["markets"]
+    ]
+    market_to_category = {k: c for k, c, _ in rows if k and c}
+    market_to_contract = {k: cc for k, _, cc in rows if k and cc}
+    
+    logger.info(f"[compute] loaded {len(market_to_category)} markets from config")
+    
+    if args.streaming:
+        logger.info(f"[compute] streaming canonical: {canonical_path}")
+        run_streaming(canonical_path, market_to_category, market_to_contract, output_path, logger)
+        hash_path.unlink(missing_ok=True)
+        store_metrics_cache(output_path, cache_path)
+        logger.info("[compute] DONE")
+        return
+    
     logger.info(f"[compute] reading canonical: {canonical_path}")
-    canonical = pd.read_parquet(canonical_path)
+    # Project to the columns build_metrics_weekly reads and push the market
+    # whitelist down to the parquet reader, so rows of markets that are not in
+    # the config are never decoded (build_metrics drops them anyway)
+    import pyarrow.parquet as pq
+    schema_names = pq.ParquetFile(canonical_path).schema_arrow.names
+    read_kwargs = {}
+    if all(c in schema_names for c in REQUIRED_CANONICAL_COLS):
+        read_kwargs["columns"] = [c for c in METRICS_INPUT_COLS if c in schema_names]
+        if market_to_category:
+            read_kwargs["filters"] = [("market_key", "in", sorted(market_to_category))]
+    canonical = pd.read_parquet(canonical_path, **read_kwargs)
     logger.info(f"[compute] canonical rows: {len(canonical)}, cols: {len(canonical.columns)}")
-    
+
+    # Downcast position/OI counts to signed int32 for the compute working set
+    # only (integer metrics are widened back to int64 before writing) and parse
+    # report_date once
+    mem_before = canonical.memory_usage(deep=True).sum()
+    position_cols = ["open_interest_all", "comm_long", "comm_short", "nc_long", "nc_short", "nr_long", "nr_short"]
+    for col in position_cols:
+        # Nullable Int64 may hold NA, which int32 cannot: leave such columns as-is
+        if col in canonical.columns and pd.api.types.is_integer_dtype(canonical[col]) and not canonical[col].hasnans:
+            # Headroom for the widest int sum in build_metrics: gross_total adds
+            # six position columns (funds/comm/nr long + short)
+            if canonical[col].abs().max() < 2**31 // 6:
+                canonical[col] = canonical[col].astype("int32")
+    if "report_date" in canonical.columns:
+        canonical["report_date"] = pd.to_datetime(canonical["report_date"])
+    # Sort once (stable) so the per-market groupby/rolling passes in
+    # build_metrics_weekly work over contiguous, already-ordered blocks
+    if "market_key" in canonical.columns and "report_date" in canonical.columns:
+        canonical = canonical.sort_values(["market_key", "report_date"], kind="stable", ignore_index=True)
+    mem_after = canonical.memory_usage(deep=True).sum()
+    logger.info(f"[compute] canonical memory: {mem_before / 1e6:.1f} MB -> {mem_after / 1e6:.1f} MB")
+
     # Validate canonical has required columns
-    required_cols = ["market_key", "report_date", "contract_code", "comm_long", "comm_short", "nc_long", "nc_short"]
-    col_errors = validate_required_columns(canonical, required_cols)
+    col_errors = validate_required_columns(canonical, REQUIRED_CANONICAL_COLS)
     if col_errors:
         for err in col_errors:
             logger.error(f"[compute] {err}")
         raise SystemExit("Canonical missing required columns")
     
-    # Read markets.yaml
-    markets_path = paths.configs / "markets.yaml"
-    logger.info(f"[compute] reading markets config: {markets_path}")
-    cfg = yaml.safe_load(markets_path.read_text(encoding="utf-8"))
-    
-    # Build market mappings
-    market_to_category = {}
-    market_to_contract = {}
-    for m in cfg["markets"]:
-        market_key = m.get("market_key") or m.get("key")
-        category = m.get("category")
-        contract_code = m.get("contract_code")
-        if market_key:
-            if category:
-                market_to_category[market_key] = category
-            if contract_code:
-                market_to_contract[market_key] = contract_code
-    
-    logger.info(f"[compute] loaded {len(market_to_category)} markets from config")
-    
     # Build metrics
     logger.info("[compute] building metrics_weekly...")
     metrics = build_metrics_weekly(canonical, market_to_category, market_to_contract)
+    # Publish int64 as the streaming path does: the output schema must not
+    # depend on the compute mode or on whether the downcast applied
+    int32_cols = [c for c in metrics.columns if metrics[c].dtype == "int32"]
+    if int32_cols:
+        metrics[int32_cols] = metrics[int32_cols].astype("int64")
     
     # Validations
-    errors = []
-    
-    # Check output rows
-    errors.extend(validate_output_rows(metrics))
-    
-    # Check uniqueness
-    errors.extend(validate_uniqueness(metrics, ["market_key", "report_date"]))
-    
-    # Check pos_all (no NaN, in [0, 1])
-    errors.extend(validate_pos_all(metrics))
-    
-    # Check pos_5y (NaN allowed, non-NaN in [0, 1])
-    errors.extend(validate_pos_5y(metrics))
-    
-    # Check max != min for ALL window
-    errors.extend(validate_max_min_all(metrics))
-    
-    # Check max != min for 5Y window
-    errors.extend(validate_max_min_5y(metrics))
-    
-    # Check WoW change columns (chg_1w)
-    errors.extend(validate_chg_1w(metrics))
-    
-    # Check net metrics
-    errors.extend(validate_net_metrics(metrics))
-    
-    # Check OI metrics
-    errors.extend(validate_oi_metrics(metrics))
-    
-    # Check exposure shares
-    errors.extend(validate_exposure_shares(metrics))
-    
-    # Check OI v1 metrics
-    errors.extend(validate_oi_v1_metrics(metrics))
+    errors = validate_all(metrics)
     
     if errors:
         for err in errors:
@@ -131,13 +268,18 @@ def main():
                    "comm_long_chg_1w", "comm_short_chg_1w", "comm_total_chg_1w"]
     logger.info(f"[compute] added columns: {', '.join(chg_columns)}")
     
-    # Write output
-    output_dir = paths.data / "compute"
-    output_dir.mkdir(parents=True, exist_ok=True)
-    
-    output_path = output_dir / "metrics_weekly.parquet"
-    metrics.to_parquet(output_path, index=False)
-    logger.info(f"[compute] wrote {output_path} rows={len(metrics)}")
+    # Write output (skipped if content matches the previous write, see sidecar hash)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(pd.util.hash_pandas_object(metrics, index=False).values.tobytes())
+    h.update(f"{list(metrics.columns)}|{[str(t) for t in metrics.dtypes]}".encode())
+    new_hash = h.hexdigest()
+    if output_path.exists() and hash_path.exists() and hash_path.read_text(encoding="utf-8") == new_hash:
+        logger.info(f"[compute] metrics unchanged, skipping write: {output_path}")
+    else:
+        metrics.to_parquet(output_path, index=False, engine="pyarrow", **PARQUET_WRITE_OPTIONS)
+        hash_path.write_text(new_hash, encoding="utf-8")
+        logger.info(f"[compute] wrote {output_path} rows={len(metrics)}")
+    store_metrics_cache(output_path, cache_path)
     logger.info("[compute] DONE")
 
 
@@ -2,8 +2,245 @@
 
 from __future__ import annotations
 
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+
+def _arrow_col(df: pd.DataFrame, name: str) -> pa.Array:
+    """Column as an Arrow array (NaN becomes null, so null_count == NaN count)."""
+    return pa.Array.from_pandas(df[name])
+
+
+def _arrow_count(mask: pa.Array) -> int:
+    """Number of True values in a boolean Arrow array (nulls are not counted)."""
+    return pc.sum(mask).as_py() or 0
+
+
+# Row positions quoted per failing check; keeps messages bounded on bad data
+MAX_SAMPLE_IDX = 10
+
+
+def _sample_idx(mask: pa.Array | np.ndarray) -> list[int]:
+    """First MAX_SAMPLE_IDX row positions where `mask` is True (Arrow nulls count as False)."""
+    if isinstance(mask, (pa.Array, pa.ChunkedArray)):
+        mask = pc.fill_null(mask, False).to_numpy(zero_copy_only=False)
+    return np.flatnonzero(mask)[:MAX_SAMPLE_IDX].tolist()
+
+
+def _bounds_counts(arr: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Per-column NaN and out-of-range counts over a packed 2-D float array.
+    
+    `arr` is (rows, columns); `lo`/`hi` hold one bound per column. NaN is never
+    counted as out of range. One vectorized pass replaces per-column walks.
+    
+    Counts are only summed for columns that an `any()` gate flags, so clean
+    data (the common case) skips the reductions.
+    """
+    return _gated_counts(np.isnan(arr)), _gated_counts(np.logical_or(arr < lo, arr > hi))
+
+
+def _share_stats(
+    values: np.ndarray,
+    tol: float = 0.0,
+    where: np.ndarray | None = None,
+) -> tuple[int, int, float, float]:
+    """
+    (NaN count, count outside [-tol, 1 + tol], min, max) of a share/position array.
+    
+    No dropna copy: NaN never compares out of range. `where` restricts the
+    stats to a row mask without gathering the rows first. min/max ignore NaN
+    and are only computed when something is out of range (NaN otherwise).
+    """
+    nan_mask = np.isnan(values)
+    out_mask = (values < -tol) | (values > 1 + tol)
+    if where is not None:
+        nan_mask &= where
+        out_mask &= where
+    nan_count = np.count_nonzero(nan_mask) if nan_mask.any() else 0
+    if not out_mask.any():
+        return nan_count, 0, np.nan, np.nan
+    if where is not None:
+        values = values[where]
+    return nan_count, np.count_nonzero(out_mask), np.nanmin(values), np.nanmax(values)
+
+
+def _gated_counts(mask: np.ndarray) -> np.ndarray:
+    """Per-column True counts of a 2-D mask, summing only the columns with any hit."""
+    counts = np.zeros(mask.shape[1], dtype=np.intp)
+    if mask.any():
+        hit = mask.any(axis=0)
+        counts[hit] = mask[:, hit].sum(axis=0)
+    return counts
+
+
+def _inf_counts(df: pd.DataFrame, cols: list[str]) -> dict[str, int]:
+    """
+    inf/-inf count per float column of `cols` (missing/non-float columns are skipped).
+    
+    The float columns are stacked into one slab so np.isinf runs as a single
+    sweep instead of one pass per column.
+    """
+    dtypes = df.dtypes
+    float_cols = [col for col in cols if col in dtypes.index and dtypes[col].kind == "f"]
+    if not float_cols:
+        return {}
+    slab = df[float_cols].to_numpy(dtype=np.float64, na_value=np.nan)
+    return dict(zip(float_cols, _gated_counts(np.isinf(slab)).tolist()))
+
+
+def _numeric_health(df: pd.DataFrame, cols: list[str]) -> list[str]:
+    """
+    dtype / inf errors for `cols` (missing columns are skipped), in column order.
+    
+    Non-numeric columns get a dtype error; float columns are checked for
+    inf/-inf through one stacked _inf_counts sweep.
+    """
+    errors = []
+    dtypes = df.dtypes
+    inf_counts = _inf_counts(df, cols)
+    for col in cols:
+        if col not in dtypes.index:
+            continue
+        if dtypes[col].kind not in "iufcb":
+            errors.append(f"{col}: dtype is not numeric (got {dtypes[col]})")
+            continue
+        inf_count = inf_counts.get(col, 0)
+        if inf_count > 0:
+            errors.append(f"{col}: found {inf_count} inf/-inf values (not allowed)")
+    return errors
+
+
+def _invalid_values(values: pd.Series, valid: set) -> set:
+    """Distinct values not in `valid`; unique() only runs on the (usually empty) violations."""
+    invalid_mask = ~values.isin(valid)
+    if not invalid_mask.any():
+        return set()
+    return set(values[invalid_mask].unique())
+
+
+def _max_abs_diff(actual: np.ndarray, expected: np.ndarray, out: np.ndarray | None = None) -> float:
+    """
+    max(|actual - expected|) ignoring NaN (-inf when nothing is comparable).
+    
+    NaN in either input propagates to the difference and is skipped, so callers
+    need no separate notna mask. Pass a float64 scratch buffer as `out` to reuse
+    one allocation across several checks.
+    """
+    diff = np.subtract(actual, expected, out=out)
+    np.abs(diff, out=diff)
+    return float(np.fmax.reduce(diff, initial=-np.inf))
+
+
+@dataclass
+class NetArrays:
+    """float64 net columns (and their abs) shared by the net validators."""
+    nc_net: np.ndarray
+    comm_net: np.ndarray
+    abs_nc_net: np.ndarray
+    abs_comm_net: np.ndarray
+    
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "NetArrays":
+        nc_net = df["nc_net"].to_numpy(dtype=np.float64)
+        comm_net = df["comm_net"].to_numpy(dtype=np.float64)
+        return cls(nc_net, comm_net, np.abs(nc_net), np.abs(comm_net))
+
+
+def _first_row_mask(df_sorted: pd.DataFrame) -> np.ndarray:
+    """
+    True for the first (earliest) row of each market_key in a frame sorted by (market_key, report_date).
+    
+    market_key is factorized to integer codes once and run starts are found by
+    comparing neighbouring codes, so no groupby index is built. Rows without a
+    market_key (code -1) are flagged too, as a groupby would treat them as
+    having no previous row.
+    """
+    codes, _ = pd.factorize(df_sorted["market_key"])
+    mask = np.ones(len(codes), dtype=bool)
+    mask[1:] = codes[1:] != codes[:-1]
+    mask |= codes == -1
+    return mask
+
+
+def _is_market_date_sorted(df: pd.DataFrame) -> bool:
+    """
+    True if `df` is already sorted by (market_key, report_date) with a 0..n-1
+    RangeIndex, i.e. exactly what sort_values(...).reset_index(drop=True) would return.
+    
+    build_metrics_weekly output already is, so validate_all can skip the sort copy.
+    """
+    index = df.index
+    if not (isinstance(index, pd.RangeIndex) and index.start == 0 and index.step == 1):
+        return False
+    keys = df["market_key"]
+    if keys.isna().any() or df["report_date"].isna().any():
+        return False
+    return pd.MultiIndex.from_arrays([keys, df["report_date"]]).is_monotonic_increasing
+
+
+def _prev_within_market(values: np.ndarray, first_row_mask: np.ndarray) -> np.ndarray:
+    """
+    Previous row's value within each market_key (NaN on each market's first row).
+    
+    Frame must be sorted by (market_key, report_date): a single shifted copy plus
+    the first-row mask replaces a groupby shift.
+    """
+    prev = np.empty(len(values), dtype=np.float64)
+    prev[1:] = values[:-1]
+    prev[first_row_mask] = np.nan
+    return prev
+
+
+def _market_boundaries(first_row_mask: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """(first row index, row count) of each contiguous market run, from _first_row_mask."""
+    first_idx = np.flatnonzero(first_row_mask)
+    sizes = np.diff(np.r_[first_idx, len(first_row_mask)])
+    return first_idx, sizes
+
+
+def _first_row_nan_errors(df_sorted: pd.DataFrame, col: str, first_row_mask: np.ndarray) -> list[str]:
+    """
+    NaN allowed only for the first row per market_key.
+    
+    Vectorized replacement for the per-market slice loop: one isna pass, NaN
+    counts per market run via np.bincount over run ids, messages in market_key order.
+    """
+    errors = []
+    nan_mask = pd.isna(df_sorted[col].to_numpy())
+    if not nan_mask.any():
+        return errors
+    
+    first_idx, _ = _market_boundaries(first_row_mask)
+    run_ids = np.cumsum(first_row_mask) - 1
+    nan_counts = np.bincount(run_ids[nan_mask], minlength=len(first_idx))
+    first_row_nan = nan_mask[first_idx]
+    run_keys = df_sorted["market_key"].to_numpy()[first_idx]
+    
+    for run in np.flatnonzero(nan_counts):
+        market_key = run_keys[run]
+        if pd.isna(market_key):
+            continue  # rows without a market_key are not grouped (as in a groupby)
+        nan_count = nan_counts[run]
+        if nan_count > 1:
+            errors.append(
+                f"{col}: {nan_count} NaN values for market_key '{market_key}' "
+                f"(expected at most 1 NaN for first row)"
+            )
+        elif not first_row_nan[run]:
+            errors.append(
+                f"{col}: NaN not in first row for market_key '{market_key}' "
+                f"(expected NaN only for first row)"
+            )
+    return errors
 
 
 def validate_canonical_exists(canonical_path: str | None) -> None:
@@ -11,23 +248,22 @@ def validate_canonical_exists(canonical_path: str | None) -> None:
     if canonical_path is None:
         raise FileNotFoundError("Canonical parquet path is None")
     
-    from pathlib import Path
-    path = Path(canonical_path)
-    if not path.exists():
+    if not os.path.exists(canonical_path):
         raise FileNotFoundError(f"Canonical parquet not found: {canonical_path}")
 
 
-def validate_required_columns(df: pd.DataFrame, required: list[str]) -> list[str]:
+def validate_required_columns(df: pd.DataFrame, required: list[str] | tuple[str, ...]) -> list[str]:
     """Check for missing required columns. Returns list of error messages."""
-    errors = []
-    missing = set(required) - set(df.columns)
-    if missing:
-        available = ", ".join(sorted(df.columns))
-        errors.append(
-            f"Missing required columns: {', '.join(sorted(missing))}. "
-            f"Available columns: {available}"
-        )
-    return errors
+    cols = frozenset(df.columns)
+    missing = [c for c in required if c not in cols]
+    if not missing:
+        return []
+    # Error path only: sort and join the available columns
+    available = ", ".join(sorted(cols))
+    return [
+        f"Missing required columns: {', '.join(sorted(missing))}. "
+        f"Available columns: {available}"
+    ]
 
 
 def validate_output_rows(df: pd.DataFrame) -> list[str]:
@@ -41,7 +277,15 @@ def validate_output_rows(df: pd.DataFrame) -> list[str]:
 def validate_uniqueness(df: pd.DataFrame, keys: list[str]) -> list[str]:
     """Check for duplicates on key columns. Returns list of error messages."""
     errors = []
-    dup_count = df.duplicated(subset=keys).sum()
+    # One hash/group pass; rows beyond the number of distinct keys are duplicates
+    try:
+        # Arrow hash aggregate (multithreaded, no pandas index construction)
+        table = pa.Table.from_pandas(df[keys], preserve_index=False)
+        n_groups = table.group_by(keys).aggregate([]).num_rows
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError):
+        # Key dtypes Arrow cannot hash (e.g. mixed-type object columns)
+        n_groups = df.groupby(keys, sort=False, observed=True, dropna=False).ngroups
+    dup_count = len(df) - n_groups
     if dup_count > 0:
         errors.append(f"Found {dup_count} duplicate rows on keys: {', '.join(keys)}")
     return errors
@@ -65,24 +309,31 @@ def validate_pos_all(df: pd.DataFrame) -> list[str]:
         groups.append("nr")
     sides = ["long", "short", "total"]
     
-    for group in groups:
-        for side in sides:
-            col = f"{group}_{side}_pos_all"
-            if col not in df.columns:
-                errors.append(f"Missing column: {col}")
-                continue
-            
-            # Check for NaN
-            nan_count = df[col].isna().sum()
-            if nan_count > 0:
-                errors.append(f"{col}: found {nan_count} NaN values (not allowed for pos_all)")
-            
-            # Check range [0, 1] for non-NaN values
-            valid_values = df[col].dropna()
-            if len(valid_values) > 0:
-                out_of_range = ((valid_values < 0) | (valid_values > 1)).sum()
-                if out_of_range > 0:
-                    errors.append(f"{col}: {out_of_range} values outside [0, 1] range")
+    cols = [f"{group}_{side}_pos_all" for group in groups for side in sides]
+    present = [col for col in cols if col in df.columns]
+    
+    # One stacked (rows, columns) pass for all NaN / range counts
+    arr = df[present].to_numpy(dtype=np.float64)
+    nan_counts, out_counts = _bounds_counts(arr, np.zeros(len(present)), np.ones(len(present)))
+    stats = dict(zip(present, zip(nan_counts, out_counts, range(len(present)))))
+    
+    for col in cols:
+        if col not in stats:
+            errors.append(f"Missing column: {col}")
+            continue
+        nan_count, out_of_range, j = stats[col]
+        
+        # Check for NaN
+        if nan_count > 0:
+            errors.append(
+                f"{col}: found {nan_count} NaN values (not allowed for pos_all); "
+                f"sample idx {_sample_idx(np.isnan(arr[:, j]))}"
+            )
+        
+        # Check range [0, 1] for non-NaN values
+        if out_of_range > 0:
+            mask = (arr[:, j] < 0) | (arr[:, j] > 1)
+            errors.append(f"{col}: {out_of_range} values outside [0, 1] range; sample idx {_sample_idx(mask)}")
     
     return errors
 
@@ -105,19 +356,24 @@ def validate_pos_5y(df: pd.DataFrame) -> list[str]:
         groups.append("nr")
     sides = ["long", "short", "total"]
     
-    for group in groups:
-        for side in sides:
-            col = f"{group}_{side}_pos_5y"
-            if col not in df.columns:
-                errors.append(f"Missing column: {col}")
-                continue
-            
-            # Check range [0, 1] for non-NaN values
-            valid_values = df[col].dropna()
-            if len(valid_values) > 0:
-                out_of_range = ((valid_values < 0) | (valid_values > 1)).sum()
-                if out_of_range > 0:
-                    errors.append(f"{col}: {out_of_range} values outside [0, 1] range")
+    cols = [f"{group}_{side}_pos_5y" for group in groups for side in sides]
+    present = [col for col in cols if col in df.columns]
+    
+    # One stacked (rows, columns) pass for all range counts (NaN allowed)
+    arr = df[present].to_numpy(dtype=np.float64)
+    _, out_counts = _bounds_counts(arr, np.zeros(len(present)), np.ones(len(present)))
+    stats = dict(zip(present, zip(out_counts, range(len(present)))))
+    
+    for col in cols:
+        if col not in stats:
+            errors.append(f"Missing column: {col}")
+            continue
+        out_of_range, j = stats[col]
+        
+        # Check range [0, 1] for non-NaN values
+        if out_of_range > 0:
+            mask = (arr[:, j] < 0) | (arr[:, j] > 1)
+            errors.append(f"{col}: {out_of_range} values outside [0, 1] range; sample idx {_sample_idx(mask)}")
     
     return errors
 
@@ -145,12 +401,12 @@ def validate_max_min_all(df: pd.DataFrame) -> list[str]:
                 continue
             
             # Check for rows where max == min (both not NaN)
-            max_eq_min = (df[min_col] == df[max_col]) & df[min_col].notna() & df[max_col].notna()
-            count = max_eq_min.sum()
+            mask = pc.equal(_arrow_col(df, min_col), _arrow_col(df, max_col))
+            count = _arrow_count(mask)
             if count > 0:
                 errors.append(
                     f"ALL window: {count} rows where {min_col} == {max_col} "
-                    f"(expected 0 for ALL window)"
+                    f"(expected 0 for ALL window); sample idx {_sample_idx(mask)}"
                 )
     
     return errors
@@ -180,18 +436,22 @@ def validate_max_min_5y(df: pd.DataFrame) -> list[str]:
             
             # Check for rows where max == min (both not NaN)
             # This should only happen if both are NaN (due to min_periods)
-            max_eq_min = (df[min_col] == df[max_col]) & df[min_col].notna() & df[max_col].notna()
-            count = max_eq_min.sum()
+            mask = pc.equal(_arrow_col(df, min_col), _arrow_col(df, max_col))
+            count = _arrow_count(mask)
             if count > 0:
-                    errors.append(
-                        f"5Y window: {count} rows where {min_col} == {max_col} "
-                        f"(not allowed, only NaN from min_periods allowed)"
-                    )
+                errors.append(
+                    f"5Y window: {count} rows where {min_col} == {max_col} "
+                    f"(not allowed, only NaN from min_periods allowed); sample idx {_sample_idx(mask)}"
+                )
     
     return errors
 
 
-def validate_chg_1w(df: pd.DataFrame) -> list[str]:
+def validate_chg_1w(
+    df: pd.DataFrame,
+    presorted: bool = False,
+    first_row_mask: np.ndarray | None = None,
+) -> list[str]:
     """
     Validate WoW change columns (*_chg_1w).
     
@@ -211,7 +471,9 @@ def validate_chg_1w(df: pd.DataFrame) -> list[str]:
     sides = ["long", "short", "total"]
     
     # Sort by market_key and report_date for validation
-    df_sorted = df.sort_values(["market_key", "report_date"]).reset_index(drop=True)
+    df_sorted = df if presorted else df.sort_values(["market_key", "report_date"]).reset_index(drop=True)
+    if first_row_mask is None or not presorted:
+        first_row_mask = _first_row_mask(df_sorted)
     
     for group in groups:
         for side in sides:
@@ -228,69 +490,38 @@ def validate_chg_1w(df: pd.DataFrame) -> list[str]:
             
             # Check 1: NaN allowed ONLY for first row per market_key
             # Count NaNs per market_key
-            for market_key in df_sorted["market_key"].unique():
-                market_mask = df_sorted["market_key"] == market_key
-                market_data = df_sorted.loc[market_mask, [col_chg, "report_date"]].sort_values("report_date")
-                
-                if len(market_data) == 0:
-                    continue
-                
-                nan_mask = market_data[col_chg].isna()
-                nan_count = nan_mask.sum()
-                
-                if nan_count > 1:
-                    errors.append(
-                        f"{col_chg}: {nan_count} NaN values for market_key '{market_key}' "
-                        f"(expected at most 1 NaN for first row)"
-                    )
-                elif nan_count == 1:
-                    # Check that NaN is in the first row (earliest report_date)
-                    first_idx = market_data.index[0]
-                    if not pd.isna(market_data.loc[first_idx, col_chg]):
-                        errors.append(
-                            f"{col_chg}: NaN not in first row for market_key '{market_key}' "
-                            f"(expected NaN only for first row)"
-                        )
+            errors.extend(_first_row_nan_errors(df_sorted, col_chg, first_row_mask))
             
             # Check 2: No inf/-inf; dtype numeric
-            if not pd.api.types.is_numeric_dtype(df_sorted[col_chg]):
-                errors.append(f"{col_chg}: dtype is not numeric (got {df_sorted[col_chg].dtype})")
-            
-            # Check for inf/-inf
-            if df_sorted[col_chg].dtype in [np.float64, np.float32]:
-                inf_mask = np.isinf(df_sorted[col_chg])
-                inf_count = inf_mask.sum()
-                if inf_count > 0:
-                    errors.append(f"{col_chg}: found {inf_count} inf/-inf values (not allowed)")
+            errors.extend(_numeric_health(df_sorted, [col_chg]))
             
             # Check 3: Formula check on sample rows (non-NaN rows only)
-            # chg == current - prev_week (where prev_week = shift(1) within market_key)
-            non_nan_mask = df_sorted[col_chg].notna()
-            if non_nan_mask.sum() > 0:
-                # Calculate expected change: current - shift(1) within market_key
-                expected_chg = df_sorted.groupby("market_key")[col_current].transform(
-                    lambda x: x - x.shift(1)
-                )
-                
-                # Compare actual vs expected (only for non-NaN rows)
-                actual_chg = df_sorted.loc[non_nan_mask, col_chg]
-                expected_chg_subset = expected_chg.loc[non_nan_mask]
+            # chg == current - prev_week (where prev_week = previous row within market_key)
+            actual_chg = df_sorted[col_chg].to_numpy(dtype=np.float64)
+            non_nan_mask = ~np.isnan(actual_chg)
+            if non_nan_mask.any():
+                current = df_sorted[col_current].to_numpy(dtype=np.float64)
+                expected_chg = current - _prev_within_market(current, first_row_mask)
                 
                 # Allow small floating point differences (1e-6)
-                diff = np.abs(actual_chg - expected_chg_subset)
+                diff = np.abs(actual_chg[non_nan_mask] - expected_chg[non_nan_mask])
                 mismatch_mask = diff > 1e-6
-                mismatch_count = mismatch_mask.sum()
                 
-                if mismatch_count > 0:
+                if mismatch_mask.any():
+                    mismatch_count = np.count_nonzero(mismatch_mask)
                     errors.append(
                         f"{col_chg}: {mismatch_count} rows where formula mismatch "
-                        f"(chg != current - prev_week) - max diff: {diff.max():.2e}"
+                        f"(chg != current - prev_week) - max diff: {np.nanmax(diff):.2e}"
                     )
     
     return errors
 
 
-def validate_net_metrics(df: pd.DataFrame) -> list[str]:
+def validate_net_metrics(
+    df: pd.DataFrame,
+    presorted: bool = False,
+    first_row_mask: np.ndarray | None = None,
+) -> list[str]:
     """
     Validate net exposure metrics.
     
@@ -327,14 +558,21 @@ def validate_net_metrics(df: pd.DataFrame) -> list[str]:
         return errors  # Early return if columns are missing
     
     # Sort by market_key and report_date for validation
-    df_sorted = df.sort_values(["market_key", "report_date"]).reset_index(drop=True)
+    df_sorted = df if presorted else df.sort_values(["market_key", "report_date"]).reset_index(drop=True)
+    if first_row_mask is None or not presorted:
+        first_row_mask = _first_row_mask(df_sorted)
+    net = NetArrays.from_frame(df_sorted)
+    # One reusable buffer for the expected values / abs diffs of all formula checks
+    scratch = np.empty(len(df_sorted), dtype=np.float64)
+    
+    def col_arr(col: str) -> np.ndarray:
+        return df_sorted[col].to_numpy(dtype=np.float64)
     
     # Check 2: Formula checks (strict)
     # nc_net == nc_long - nc_short
     if "nc_long" in df_sorted.columns and "nc_short" in df_sorted.columns:
-        expected_nc_net = df_sorted["nc_long"] - df_sorted["nc_short"]
-        diff_nc_net = np.abs(df_sorted["nc_net"] - expected_nc_net)
-        max_diff = diff_nc_net.max()
+        np.subtract(col_arr("nc_long"), col_arr("nc_short"), out=scratch)
+        max_diff = _max_abs_diff(net.nc_net, scratch, out=scratch)
         if max_diff > 1e-6:
             errors.append(
                 f"nc_net formula mismatch: max diff = {max_diff:.2e} "
@@ -345,9 +583,8 @@ def validate_net_metrics(df: pd.DataFrame) -> list[str]:
     
     # comm_net == comm_long - comm_short
     if "comm_long" in df_sorted.columns and "comm_short" in df_sorted.columns:
-        expected_comm_net = df_sorted["comm_long"] - df_sorted["comm_short"]
-        diff_comm_net = np.abs(df_sorted["comm_net"] - expected_comm_net)
-        max_diff = diff_comm_net.max()
+        np.subtract(col_arr("comm_long"), col_arr("comm_short"), out=scratch)
+        max_diff = _max_abs_diff(net.comm_net, scratch, out=scratch)
         if max_diff > 1e-6:
             errors.append(
                 f"comm_net formula mismatch: max diff = {max_diff:.2e} "
@@ -357,9 +594,8 @@ def validate_net_metrics(df: pd.DataFrame) -> list[str]:
         errors.append("Missing source columns for comm_net validation: comm_long, comm_short")
     
     # spec_vs_hedge_net == nc_net - comm_net
-    expected_spec_vs_hedge = df_sorted["nc_net"] - df_sorted["comm_net"]
-    diff_spec_vs_hedge = np.abs(df_sorted["spec_vs_hedge_net"] - expected_spec_vs_hedge)
-    max_diff = diff_spec_vs_hedge.max()
+    np.subtract(net.nc_net, net.comm_net, out=scratch)
+    max_diff = _max_abs_diff(col_arr("spec_vs_hedge_net"), scratch, out=scratch)
     if max_diff > 1e-6:
         errors.append(
             f"spec_vs_hedge_net formula mismatch: max diff = {max_diff:.2e} "
@@ -369,9 +605,8 @@ def validate_net_metrics(df: pd.DataFrame) -> list[str]:
     # nr_net == nr_long - nr_short (if NR exists)
     if has_nr:
         if "nr_long" in df_sorted.columns and "nr_short" in df_sorted.columns:
-            expected_nr_net = df_sorted["nr_long"] - df_sorted["nr_short"]
-            diff_nr_net = np.abs(df_sorted["nr_net"] - expected_nr_net)
-            max_diff = diff_nr_net.max()
+            np.subtract(col_arr("nr_long"), col_arr("nr_short"), out=scratch)
+            max_diff = _max_abs_diff(col_arr("nr_net"), scratch, out=scratch)
             if max_diff > 1e-6:
                 errors.append(
                     f"nr_net formula mismatch: max diff = {max_diff:.2e} "
@@ -381,66 +616,36 @@ def validate_net_metrics(df: pd.DataFrame) -> list[str]:
             errors.append("Missing source columns for nr_net validation: nr_long, nr_short")
     
     # Check 3: No NaN in nc_net, comm_net, spec_vs_hedge_net (and nr_net if exists)
-    for col in ["nc_net", "comm_net", "spec_vs_hedge_net"]:
-        nan_count = df_sorted[col].isna().sum()
+    net_cols = ["nc_net", "comm_net", "spec_vs_hedge_net"] + (["nr_net"] if has_nr else [])
+    for col, nan_count in df_sorted[net_cols].isna().sum().items():
         if nan_count > 0:
             errors.append(f"{col}: found {nan_count} NaN values (not allowed)")
-    if has_nr:
-        nan_count = df_sorted["nr_net"].isna().sum()
-        if nan_count > 0:
-            errors.append(f"nr_net: found {nan_count} NaN values (not allowed)")
     
     # Check 4: *_chg_1w NaN allowed only for first row per market_key
     chg_cols = ["nc_net_chg_1w", "comm_net_chg_1w", "spec_vs_hedge_net_chg_1w"]
     if has_nr:
         chg_cols.append("nr_net_chg_1w")
     for col_chg in chg_cols:
-        for market_key in df_sorted["market_key"].unique():
-            market_mask = df_sorted["market_key"] == market_key
-            market_data = df_sorted.loc[market_mask, [col_chg, "report_date"]].sort_values("report_date")
-            
-            if len(market_data) == 0:
-                continue
-            
-            nan_mask = market_data[col_chg].isna()
-            nan_count = nan_mask.sum()
-            
-            if nan_count > 1:
-                errors.append(
-                    f"{col_chg}: {nan_count} NaN values for market_key '{market_key}' "
-                    f"(expected at most 1 NaN for first row)"
-                )
-            elif nan_count == 1:
-                # Check that NaN is in the first row (earliest report_date)
-                first_idx = market_data.index[0]
-                if not pd.isna(market_data.loc[first_idx, col_chg]):
-                    errors.append(
-                        f"{col_chg}: NaN not in first row for market_key '{market_key}' "
-                        f"(expected NaN only for first row)"
-                    )
+        errors.extend(_first_row_nan_errors(df_sorted, col_chg, first_row_mask))
     
     # Check 5: No inf/-inf in new columns
-    for col in required_cols:
-        if not pd.api.types.is_numeric_dtype(df_sorted[col]):
-            errors.append(f"{col}: dtype is not numeric (got {df_sorted[col].dtype})")
-            continue
-        
-        if df_sorted[col].dtype in [np.float64, np.float32]:
-            inf_mask = np.isinf(df_sorted[col])
-            inf_count = inf_mask.sum()
-            if inf_count > 0:
-                errors.append(f"{col}: found {inf_count} inf/-inf values (not allowed)")
+    errors.extend(_numeric_health(df_sorted, required_cols))
     
     # Check rebalance decomposition metrics
-    errors.extend(validate_rebalance_metrics(df))
+    errors.extend(validate_rebalance_metrics(df_sorted, presorted=True))
     
     # Check net side and magnitude gap metrics
-    errors.extend(validate_net_side_and_mag_gap(df))
+    errors.extend(validate_net_side_and_mag_gap(df_sorted, presorted=True, net_arrays=net, first_row_mask=first_row_mask))
     
     return errors
 
 
-def validate_net_side_and_mag_gap(df: pd.DataFrame) -> list[str]:
+def validate_net_side_and_mag_gap(
+    df: pd.DataFrame,
+    presorted: bool = False,
+    net_arrays: NetArrays | None = None,
+    first_row_mask: np.ndarray | None = None,
+) -> list[str]:
     """
     Validate net side indicators and magnitude gap metrics.
     
@@ -453,6 +658,9 @@ def validate_net_side_and_mag_gap(df: pd.DataFrame) -> list[str]:
     6) nc_net_side/comm_net_side only in {"NET_LONG", "NET_SHORT", "FLAT"}
     7) net_alignment only in {"SAME_SIDE", "OPPOSITE_SIDE", "UNKNOWN"}
     
+    `net_arrays` / `first_row_mask` let validate_net_metrics share its nc_net/comm_net
+    arrays and first-row mask.
+    
     Returns list of error messages.
     """
     errors = []
@@ -471,13 +679,12 @@ def validate_net_side_and_mag_gap(df: pd.DataFrame) -> list[str]:
         return errors  # Early return if columns are missing
     
     # Sort by market_key and report_date for validation
-    df_sorted = df.sort_values(["market_key", "report_date"]).reset_index(drop=True)
+    df_sorted = df if presorted else df.sort_values(["market_key", "report_date"]).reset_index(drop=True)
     
     # Check 2: net_mag_gap formula check
     if "nc_net" in df_sorted.columns and "comm_net" in df_sorted.columns:
-        expected_mag_gap = np.abs(df_sorted["nc_net"]) - np.abs(df_sorted["comm_net"])
-        diff_mag_gap = np.abs(df_sorted["net_mag_gap"] - expected_mag_gap)
-        max_diff = diff_mag_gap.max()
+        net = net_arrays if net_arrays is not None else NetArrays.from_frame(df_sorted)
+        max_diff = _max_abs_diff(df_sorted["net_mag_gap"].to_numpy(dtype=np.float64), net.abs_nc_net - net.abs_comm_net)
         if max_diff > 1e-6:
             errors.append(
                 f"net_mag_gap formula mismatch: max diff = {max_diff:.2e} "
@@ -486,49 +693,44 @@ def validate_net_side_and_mag_gap(df: pd.DataFrame) -> list[str]:
     else:
         errors.append("Missing source columns for net_mag_gap validation: nc_net, comm_net")
     
+    # Checks 3-5 work on plain ndarrays (frame has a RangeIndex, so no index
+    # alignment is needed); NaN rows drop out of comparisons and _max_abs_diff
+    mag_gap = df_sorted["net_mag_gap"].to_numpy(dtype=np.float64)
+    
     # Check 3: net_mag_gap_chg_1w equals diff check
     if "net_mag_gap" in df_sorted.columns:
-        expected_chg = df_sorted.groupby("market_key")["net_mag_gap"].transform(
-            lambda x: x - x.shift(1)
-        )
-        # Compare only non-NaN rows
-        mask = df_sorted["net_mag_gap_chg_1w"].notna() & expected_chg.notna()
-        if mask.sum() > 0:
-            diff_chg = np.abs(df_sorted.loc[mask, "net_mag_gap_chg_1w"] - expected_chg.loc[mask])
-            max_diff = diff_chg.max()
-            if max_diff > 1e-6:
-                errors.append(
-                    f"net_mag_gap_chg_1w formula mismatch: max diff = {max_diff:.2e} "
-                    f"(expected: net_mag_gap_chg_1w == net_mag_gap - shift(1))"
-                )
-    
-    # Check 4: net_mag_gap_max_abs_5y >= abs(net_mag_gap) where not NaN
-    mask_max = df_sorted["net_mag_gap_max_abs_5y"].notna() & df_sorted["net_mag_gap"].notna()
-    if mask_max.sum() > 0:
-        abs_mag_gap = np.abs(df_sorted.loc[mask_max, "net_mag_gap"])
-        max_abs_5y = df_sorted.loc[mask_max, "net_mag_gap_max_abs_5y"]
-        violation = (max_abs_5y < abs_mag_gap).sum()
-        if violation > 0:
+        if first_row_mask is None or not presorted:
+            first_row_mask = _first_row_mask(df_sorted)
+        expected_chg = mag_gap - _prev_within_market(mag_gap, first_row_mask)
+        max_diff = _max_abs_diff(df_sorted["net_mag_gap_chg_1w"].to_numpy(dtype=np.float64), expected_chg)
+        if max_diff > 1e-6:
             errors.append(
-                f"net_mag_gap_max_abs_5y: {violation} rows where max_abs_5y < abs(net_mag_gap) "
-                f"(max_abs_5y must be >= abs(net_mag_gap))"
+                f"net_mag_gap_chg_1w formula mismatch: max diff = {max_diff:.2e} "
+                f"(expected: net_mag_gap_chg_1w == net_mag_gap - shift(1))"
             )
     
+    # Check 4: net_mag_gap_max_abs_5y >= abs(net_mag_gap) where not NaN
+    max_abs_5y = df_sorted["net_mag_gap_max_abs_5y"].to_numpy(dtype=np.float64)
+    violation_mask = max_abs_5y < np.abs(mag_gap)
+    if violation_mask.any():
+        violation = np.count_nonzero(violation_mask)
+        errors.append(
+            f"net_mag_gap_max_abs_5y: {violation} rows where max_abs_5y < abs(net_mag_gap) "
+            f"(max_abs_5y must be >= abs(net_mag_gap))"
+        )
+    
     # Check 5: net_mag_gap_pos_5y in [0, 1] where not NaN
-    mask_pos = df_sorted["net_mag_gap_pos_5y"].notna()
-    if mask_pos.sum() > 0:
-        pos_values = df_sorted.loc[mask_pos, "net_mag_gap_pos_5y"]
-        out_of_range = ((pos_values < 0) | (pos_values > 1)).sum()
-        if out_of_range > 0:
-            errors.append(
-                f"net_mag_gap_pos_5y: {out_of_range} values outside [0, 1] range "
-                f"(min: {pos_values.min():.6f}, max: {pos_values.max():.6f})"
-            )
+    _, out_of_range, lo, hi = _share_stats(df_sorted["net_mag_gap_pos_5y"].to_numpy(dtype=np.float64))
+    if out_of_range > 0:
+        errors.append(
+            f"net_mag_gap_pos_5y: {out_of_range} values outside [0, 1] range "
+            f"(min: {lo:.6f}, max: {hi:.6f})"
+        )
     
     # Check 6: nc_net_side/comm_net_side only in {"NET_LONG", "NET_SHORT", "FLAT"}
     valid_sides = {"NET_LONG", "NET_SHORT", "FLAT"}
     for col in ["nc_net_side", "comm_net_side"]:
-        invalid = set(df_sorted[col].unique()) - valid_sides
+        invalid = _invalid_values(df_sorted[col], valid_sides)
         if invalid:
             errors.append(
                 f"{col}: invalid values found: {sorted(invalid)} "
@@ -537,7 +739,7 @@ def validate_net_side_and_mag_gap(df: pd.DataFrame) -> list[str]:
     
     # Check 6b: nr_net_side only in {"NET_LONG", "NET_SHORT", "FLAT"} (if exists)
     if "nr_net_side" in df_sorted.columns:
-        invalid = set(df_sorted["nr_net_side"].unique()) - valid_sides
+        invalid = _invalid_values(df_sorted["nr_net_side"], valid_sides)
         if invalid:
             errors.append(
                 f"nr_net_side: invalid values found: {sorted(invalid)} "
@@ -546,7 +748,7 @@ def validate_net_side_and_mag_gap(df: pd.DataFrame) -> list[str]:
     
     # Check 7: net_alignment only in {"SAME_SIDE", "OPPOSITE_SIDE", "UNKNOWN"}
     valid_alignments = {"SAME_SIDE", "OPPOSITE_SIDE", "UNKNOWN"}
-    invalid_alignments = set(df_sorted["net_alignment"].unique()) - valid_alignments
+    invalid_alignments = _invalid_values(df_sorted["net_alignment"], valid_alignments)
     if invalid_alignments:
         errors.append(
             f"net_alignment: invalid values found: {sorted(invalid_alignments)} "
@@ -554,12 +756,16 @@ def validate_net_side_and_mag_gap(df: pd.DataFrame) -> list[str]:
         )
     
     # Check net flip flags
-    errors.extend(validate_net_flip_flags(df))
+    errors.extend(validate_net_flip_flags(df, presorted=presorted, first_row_mask=first_row_mask))
     
     return errors
 
 
-def validate_net_flip_flags(df: pd.DataFrame) -> list[str]:
+def validate_net_flip_flags(
+    df: pd.DataFrame,
+    presorted: bool = False,
+    first_row_mask: np.ndarray | None = None,
+) -> list[str]:
     """
     Validate net flip flags (sign change detection).
     
@@ -591,14 +797,15 @@ def validate_net_flip_flags(df: pd.DataFrame) -> list[str]:
         return errors  # Early return if columns are missing
     
     # Sort by market_key and report_date for validation
-    df_sorted = df.sort_values(["market_key", "report_date"]).reset_index(drop=True)
+    df_sorted = df if presorted else df.sort_values(["market_key", "report_date"]).reset_index(drop=True)
     
     # Check 2: Type and value check
+    # Allow bool or 0/1 int
+    valid_vals = {True, False, 0, 1}
     for col in required_cols:
-        unique_vals = set(df_sorted[col].dropna().unique())
-        # Allow bool or 0/1 int
-        valid_vals = {True, False, 0, 1}
-        invalid_vals = unique_vals - valid_vals
+        if df_sorted[col].dtype == bool:
+            continue  # bool dtype cannot hold anything else
+        invalid_vals = _invalid_values(df_sorted[col].dropna(), valid_vals)
         if invalid_vals:
             errors.append(
                 f"{col}: invalid values found: {sorted(invalid_vals)} "
@@ -606,97 +813,40 @@ def validate_net_flip_flags(df: pd.DataFrame) -> list[str]:
             )
     
     # Check 3: Formula check - reproduce expected flip
-    def sign_func(val):
-        """Sign function: 1 if >0, -1 if <0, 0 if ==0 or NaN."""
-        if pd.isna(val):
-            return 0
-        if val > 0:
-            return 1
-        elif val < 0:
-            return -1
-        else:
-            return 0
-    
-    # Check nc_net_flip_1w
-    if "nc_net" in df_sorted.columns:
-        prev_nc = df_sorted.groupby("market_key")["nc_net"].shift(1)
-        curr_nc = df_sorted["nc_net"]
-        
-        prev_sign = prev_nc.apply(sign_func)
-        curr_sign = curr_nc.apply(sign_func)
-        
-        expected_flip = (prev_sign != 0) & (curr_sign != 0) & (curr_sign != prev_sign)
-        expected_flip = expected_flip.fillna(False).astype(bool)
-        
-        actual_flip = df_sorted["nc_net_flip_1w"].fillna(False).astype(bool)
-        
-        mismatch = (expected_flip != actual_flip).sum()
-        if mismatch > 0:
-            errors.append(
-                f"nc_net_flip_1w formula mismatch: {mismatch} rows where expected != actual"
-            )
-    
-    # Check comm_net_flip_1w
-    if "comm_net" in df_sorted.columns:
-        prev_comm = df_sorted.groupby("market_key")["comm_net"].shift(1)
-        curr_comm = df_sorted["comm_net"]
-        
-        prev_sign = prev_comm.apply(sign_func)
-        curr_sign = curr_comm.apply(sign_func)
-        
-        expected_flip = (prev_sign != 0) & (curr_sign != 0) & (curr_sign != prev_sign)
-        expected_flip = expected_flip.fillna(False).astype(bool)
-        
-        actual_flip = df_sorted["comm_net_flip_1w"].fillna(False).astype(bool)
-        
-        mismatch = (expected_flip != actual_flip).sum()
-        if mismatch > 0:
-            errors.append(
-                f"comm_net_flip_1w formula mismatch: {mismatch} rows where expected != actual"
-            )
-    
-    # Check spec_vs_hedge_net_flip_1w
-    if "spec_vs_hedge_net" in df_sorted.columns:
-        prev_spec = df_sorted.groupby("market_key")["spec_vs_hedge_net"].shift(1)
-        curr_spec = df_sorted["spec_vs_hedge_net"]
-        
-        prev_sign = prev_spec.apply(sign_func)
-        curr_sign = curr_spec.apply(sign_func)
-        
-        expected_flip = (prev_sign != 0) & (curr_sign != 0) & (curr_sign != prev_sign)
-        expected_flip = expected_flip.fillna(False).astype(bool)
-        
-        actual_flip = df_sorted["spec_vs_hedge_net_flip_1w"].fillna(False).astype(bool)
-        
-        mismatch = (expected_flip != actual_flip).sum()
-        if mismatch > 0:
-            errors.append(
-                f"spec_vs_hedge_net_flip_1w formula mismatch: {mismatch} rows where expected != actual"
-            )
+    # sign() is 0 for NaN (nan_to_num), so NaN on either side never counts as a flip
+    flip_checks = [
+        ("nc_net", "nc_net_flip_1w"),
+        ("comm_net", "comm_net_flip_1w"),
+        ("spec_vs_hedge_net", "spec_vs_hedge_net_flip_1w"),
+    ]
+    if has_nr_flip:
+        flip_checks.append(("nr_net", "nr_net_flip_1w"))
     
-    # Check nr_net_flip_1w (if exists)
-    if has_nr_flip and "nr_net" in df_sorted.columns:
-        prev_nr = df_sorted.groupby("market_key")["nr_net"].shift(1)
-        curr_nr = df_sorted["nr_net"]
+    if first_row_mask is None or not presorted:
+        first_row_mask = _first_row_mask(df_sorted)
+    for base_col, flip_col in flip_checks:
+        if base_col not in df_sorted.columns:
+            continue
         
-        prev_sign = prev_nr.apply(sign_func)
-        curr_sign = curr_nr.apply(sign_func)
+        curr = df_sorted[base_col].to_numpy(dtype=np.float64)
+        prev = _prev_within_market(curr, first_row_mask)
+        curr_sign = np.sign(np.nan_to_num(curr))
+        prev_sign = np.sign(np.nan_to_num(prev))
         
         expected_flip = (prev_sign != 0) & (curr_sign != 0) & (curr_sign != prev_sign)
-        expected_flip = expected_flip.fillna(False).astype(bool)
-        
-        actual_flip = df_sorted["nr_net_flip_1w"].fillna(False).astype(bool)
+        actual_flip = df_sorted[flip_col].fillna(False).astype(bool).to_numpy()
         
-        mismatch = (expected_flip != actual_flip).sum()
-        if mismatch > 0:
+        mismatch_mask = expected_flip ^ actual_flip
+        if mismatch_mask.any():
+            mismatch = np.count_nonzero(mismatch_mask)
             errors.append(
-                f"nr_net_flip_1w formula mismatch: {mismatch} rows where expected != actual"
+                f"{flip_col} formula mismatch: {mismatch} rows where expected != actual"
             )
     
     return errors
 
 
-def validate_rebalance_metrics(df: pd.DataFrame) -> list[str]:
+def validate_rebalance_metrics(df: pd.DataFrame, presorted: bool = False) -> list[str]:
     """
     Validate rebalance decomposition metrics.
     
@@ -729,54 +879,41 @@ def validate_rebalance_metrics(df: pd.DataFrame) -> list[str]:
         return errors  # Early return if columns are missing
     
     # Sort by market_key and report_date for validation
-    df_sorted = df.sort_values(["market_key", "report_date"]).reset_index(drop=True)
+    df_sorted = df if presorted else df.sort_values(["market_key", "report_date"]).reset_index(drop=True)
     
     # Check 2: No inf/-inf in new columns + net_chg_1w columns
     inf_check_cols = required_cols + ["nc_net_chg_1w", "comm_net_chg_1w"]
     if has_nr_reb:
         inf_check_cols.append("nr_net_chg_1w")
-    for col in inf_check_cols:
-        if col not in df_sorted.columns:
-            continue
-        if not pd.api.types.is_numeric_dtype(df_sorted[col]):
-            errors.append(f"{col}: dtype is not numeric (got {df_sorted[col].dtype})")
-            continue
-        if df_sorted[col].dtype in [np.float64, np.float32]:
-            inf_mask = np.isinf(df_sorted[col])
-            inf_count = inf_mask.sum()
-            if inf_count > 0:
-                errors.append(f"{col}: found {inf_count} inf/-inf values (not allowed)")
+    errors.extend(_numeric_health(df_sorted, inf_check_cols))
     
     # Check 3: Invariants (net_chg_1w == long_chg_1w - short_chg_1w)
+    # Rows with NaN in any of the three columns drop out via _max_abs_diff
     tol = 1e-9
+    scratch = np.empty(len(df_sorted), dtype=np.float64)
+    
+    def col_arr(col: str) -> np.ndarray:
+        return df_sorted[col].to_numpy(dtype=np.float64)
     
     # nc_net_chg_1w == nc_long_chg_1w - nc_short_chg_1w
     if all(col in df_sorted.columns for col in ["nc_long_chg_1w", "nc_short_chg_1w", "nc_net_chg_1w"]):
-        nc_mask = df_sorted["nc_long_chg_1w"].notna() & df_sorted["nc_short_chg_1w"].notna() & df_sorted["nc_net_chg_1w"].notna()
-        if nc_mask.sum() > 0:
-            expected_nc_net_chg = df_sorted.loc[nc_mask, "nc_long_chg_1w"] - df_sorted.loc[nc_mask, "nc_short_chg_1w"]
-            actual_nc_net_chg = df_sorted.loc[nc_mask, "nc_net_chg_1w"]
-            diff_nc = np.abs(actual_nc_net_chg - expected_nc_net_chg)
-            max_diff = diff_nc.max()
-            if max_diff > tol:
-                errors.append(
-                    f"nc_net_chg_1w invariant mismatch: max diff = {max_diff:.2e} "
-                    f"(expected: nc_net_chg_1w == nc_long_chg_1w - nc_short_chg_1w)"
-                )
+        np.subtract(col_arr("nc_long_chg_1w"), col_arr("nc_short_chg_1w"), out=scratch)
+        max_diff = _max_abs_diff(col_arr("nc_net_chg_1w"), scratch, out=scratch)
+        if max_diff > tol:
+            errors.append(
+                f"nc_net_chg_1w invariant mismatch: max diff = {max_diff:.2e} "
+                f"(expected: nc_net_chg_1w == nc_long_chg_1w - nc_short_chg_1w)"
+            )
     
     # comm_net_chg_1w == comm_long_chg_1w - comm_short_chg_1w
     if all(col in df_sorted.columns for col in ["comm_long_chg_1w", "comm_short_chg_1w", "comm_net_chg_1w"]):
-        comm_mask = df_sorted["comm_long_chg_1w"].notna() & df_sorted["comm_short_chg_1w"].notna() & df_sorted["comm_net_chg_1w"].notna()
-        if comm_mask.sum() > 0:
-            expected_comm_net_chg = df_sorted.loc[comm_mask, "comm_long_chg_1w"] - df_sorted.loc[comm_mask, "comm_short_chg_1w"]
-            actual_comm_net_chg = df_sorted.loc[comm_mask, "comm_net_chg_1w"]
-            diff_comm = np.abs(actual_comm_net_chg - expected_comm_net_chg)
-            max_diff = diff_comm.max()
-            if max_diff > tol:
-                errors.append(
-                    f"comm_net_chg_1w invariant mismatch: max diff = {max_diff:.2e} "
-                    f"(expected: comm_net_chg_1w == comm_long_chg_1w - comm_short_chg_1w)"
-                )
+        np.subtract(col_arr("comm_long_chg_1w"), col_arr("comm_short_chg_1w"), out=scratch)
+        max_diff = _max_abs_diff(col_arr("comm_net_chg_1w"), scratch, out=scratch)
+        if max_diff > tol:
+            errors.append(
+                f"comm_net_chg_1w invariant mismatch: max diff = {max_diff:.2e} "
+                f"(expected: comm_net_chg_1w == comm_long_chg_1w - comm_short_chg_1w)"
+            )
     
     # Check 4: Mathematical constraints (for nc, comm, and optionally nr)
     prefixes = ["nc", "comm"]
@@ -788,17 +925,17 @@ def validate_rebalance_metrics(df: pd.DataFrame) -> list[str]:
         rebalance_col = f"{prefix}_rebalance_chg_1w"
         share_col = f"{prefix}_rebalance_share_1w"
         
-        # Non-NaN mask for required fields
-        mask = (
-            df_sorted[gross_col].notna() &
-            df_sorted[net_abs_col].notna() &
-            df_sorted[rebalance_col].notna()
-        )
+        gross_all = col_arr(gross_col)
+        net_abs_all = col_arr(net_abs_col)
+        rebalance_all = col_arr(rebalance_col)
+        
+        # Non-NaN mask for required fields (ndarray, so selections skip index alignment)
+        mask = ~(np.isnan(gross_all) | np.isnan(net_abs_all) | np.isnan(rebalance_all))
         
-        if mask.sum() > 0:
-            gross = df_sorted.loc[mask, gross_col]
-            net_abs = df_sorted.loc[mask, net_abs_col]
-            rebalance = df_sorted.loc[mask, rebalance_col]
+        if mask.any():
+            gross = gross_all[mask]
+            net_abs = net_abs_all[mask]
+            rebalance = rebalance_all[mask]
             
             # gross >= 0
             if (gross < 0).any():
@@ -813,9 +950,8 @@ def validate_rebalance_metrics(df: pd.DataFrame) -> list[str]:
                 errors.append(f"{rebalance_col}: found values < -{tol} (must be >= 0)")
             
             # rebalance == gross - net_abs (with tolerance)
-            expected_rebalance = gross - net_abs
-            diff_rebalance = np.abs(rebalance - expected_rebalance)
-            max_diff = diff_rebalance.max()
+            np.subtract(gross_all, net_abs_all, out=scratch)
+            max_diff = _max_abs_diff(rebalance_all, scratch, out=scratch)
             if max_diff > tol:
                 errors.append(
                     f"{rebalance_col} formula mismatch: max diff = {max_diff:.2e} "
@@ -824,31 +960,28 @@ def validate_rebalance_metrics(df: pd.DataFrame) -> list[str]:
             
             # Check 5: Share bounds
             # For gross > 0: 0 <= rebalance_share <= 1
-            gross_pos_mask = mask & (df_sorted[gross_col] > 0)
-            if gross_pos_mask.sum() > 0:
-                share_values = df_sorted.loc[gross_pos_mask, share_col]
+            # Share checks count over row masks directly instead of gathering the rows
+            share_all = col_arr(share_col)
+            gross_pos_mask = mask & (gross_all > 0)
+            if gross_pos_mask.any():
+                nan_count, out_of_range, lo, hi = _share_stats(share_all, tol, where=gross_pos_mask)
                 # Check for NaN where gross > 0 (should not happen)
-                nan_count = share_values.isna().sum()
                 if nan_count > 0:
                     errors.append(f"{share_col}: found {nan_count} NaN values where {gross_col} > 0 (not allowed)")
                 
                 # Check bounds [0, 1]
-                valid_share = share_values.dropna()
-                if len(valid_share) > 0:
-                    out_of_range = ((valid_share < -tol) | (valid_share > 1 + tol)).sum()
-                    if out_of_range > 0:
-                        errors.append(
-                            f"{share_col}: {out_of_range} values outside [0, 1] range "
-                            f"(min: {valid_share.min():.6f}, max: {valid_share.max():.6f})"
-                        )
+                if out_of_range > 0:
+                    errors.append(
+                        f"{share_col}: {out_of_range} values outside [0, 1] range "
+                        f"(min: {lo:.6f}, max: {hi:.6f})"
+                    )
             
             # For gross == 0: rebalance_share must be NaN
-            gross_zero_mask = mask & (df_sorted[gross_col] == 0)
-            if gross_zero_mask.sum() > 0:
-                share_values_zero = df_sorted.loc[gross_zero_mask, share_col]
-                nan_count_zero = share_values_zero.isna().sum()
-                non_nan_count = (gross_zero_mask.sum() - nan_count_zero)
-                if non_nan_count > 0:
+            gross_zero_mask = mask & (gross_all == 0)
+            if gross_zero_mask.any():
+                non_nan_mask = gross_zero_mask & ~np.isnan(share_all)
+                if non_nan_mask.any():
+                    non_nan_count = np.count_nonzero(non_nan_mask)
                     errors.append(
                         f"{share_col}: found {non_nan_count} non-NaN values where {gross_col} == 0 "
                         f"(must be NaN)"
@@ -857,7 +990,11 @@ def validate_rebalance_metrics(df: pd.DataFrame) -> list[str]:
     return errors
 
 
-def validate_oi_metrics(df: pd.DataFrame) -> list[str]:
+def validate_oi_metrics(
+    df: pd.DataFrame,
+    presorted: bool = False,
+    first_row_mask: np.ndarray | None = None,
+) -> list[str]:
     """
     Validate Open Interest metrics.
     
@@ -889,82 +1026,50 @@ def validate_oi_metrics(df: pd.DataFrame) -> list[str]:
         return errors  # Early return if columns are missing
     
     # Sort by market_key and report_date for validation
-    df_sorted = df.sort_values(["market_key", "report_date"]).reset_index(drop=True)
-    
-    # Check 2: open_interest >= 0
-    negative_oi = (df_sorted["open_interest"] < 0).sum()
-    if negative_oi > 0:
+    df_sorted = df if presorted else df.sort_values(["market_key", "report_date"]).reset_index(drop=True)
+    if first_row_mask is None or not presorted:
+        first_row_mask = _first_row_mask(df_sorted)
+    
+    # Check 2: open_interest >= 0 (count only once any() finds a violation)
+    negative_mask = df_sorted["open_interest"].to_numpy() < 0
+    if negative_mask.any():
+        negative_oi = np.count_nonzero(negative_mask)
         errors.append(f"open_interest: found {negative_oi} negative values (must be >= 0)")
     
+    # Checks 3-4: both pos columns in one packed bounds pass
+    pos_values = df_sorted[["open_interest_pos_all", "open_interest_pos_5y"]].to_numpy(dtype=np.float64)
+    nan_counts, out_counts = _bounds_counts(pos_values, np.array([0.0, 0.0]), np.array([1.0, 1.0]))
+    
     # Check 3: open_interest_pos_all: no NaN, all values in [0, 1]
-    nan_count_all = df_sorted["open_interest_pos_all"].isna().sum()
+    nan_count_all = nan_counts[0]
     if nan_count_all > 0:
         errors.append(f"open_interest_pos_all: found {nan_count_all} NaN values (not allowed for pos_all)")
-    
-    valid_pos_all = df_sorted["open_interest_pos_all"].dropna()
-    if len(valid_pos_all) > 0:
-        out_of_range = ((valid_pos_all < 0) | (valid_pos_all > 1)).sum()
-        if out_of_range > 0:
-            errors.append(f"open_interest_pos_all: {out_of_range} values outside [0, 1] range")
+    if out_counts[0] > 0:
+        errors.append(f"open_interest_pos_all: {out_counts[0]} values outside [0, 1] range")
     
     # Check 4: open_interest_pos_5y: NaN allowed, non-NaN in [0, 1]
-    valid_pos_5y = df_sorted["open_interest_pos_5y"].dropna()
-    if len(valid_pos_5y) > 0:
-        out_of_range = ((valid_pos_5y < 0) | (valid_pos_5y > 1)).sum()
-        if out_of_range > 0:
-            errors.append(f"open_interest_pos_5y: {out_of_range} values outside [0, 1] range")
+    if out_counts[1] > 0:
+        errors.append(f"open_interest_pos_5y: {out_counts[1]} values outside [0, 1] range")
     
     # Check 5: open_interest_chg_1w: NaN allowed only for first row per market_key
-    for market_key in df_sorted["market_key"].unique():
-        market_mask = df_sorted["market_key"] == market_key
-        market_data = df_sorted.loc[market_mask, ["open_interest_chg_1w", "report_date"]].sort_values("report_date")
-        
-        if len(market_data) == 0:
-            continue
-        
-        nan_mask = market_data["open_interest_chg_1w"].isna()
-        nan_count = nan_mask.sum()
-        
-        if nan_count > 1:
-            errors.append(
-                f"open_interest_chg_1w: {nan_count} NaN values for market_key '{market_key}' "
-                f"(expected at most 1 NaN for first row)"
-            )
-        elif nan_count == 1:
-            # Check that NaN is in the first row (earliest report_date)
-            first_idx = market_data.index[0]
-            if not pd.isna(market_data.loc[first_idx, "open_interest_chg_1w"]):
-                errors.append(
-                    f"open_interest_chg_1w: NaN not in first row for market_key '{market_key}' "
-                    f"(expected NaN only for first row)"
-                )
+    errors.extend(_first_row_nan_errors(df_sorted, "open_interest_chg_1w", first_row_mask))
     
     # Check 6: open_interest_chg_1w_pct: no inf/-inf
     if "open_interest_chg_1w_pct" in df_sorted.columns:
-        if df_sorted["open_interest_chg_1w_pct"].dtype in [np.float64, np.float32]:
-            inf_mask = np.isinf(df_sorted["open_interest_chg_1w_pct"])
-            inf_count = inf_mask.sum()
-            if inf_count > 0:
+        if df_sorted["open_interest_chg_1w_pct"].dtype.kind == "f":
+            inf_mask = np.isinf(df_sorted["open_interest_chg_1w_pct"].to_numpy(dtype=np.float64, na_value=np.nan))
+            if inf_mask.any():
+                inf_count = inf_mask.sum()
                 errors.append(f"open_interest_chg_1w_pct: found {inf_count} inf/-inf values (not allowed)")
     
     # Check 7: No inf/-inf in OI columns
-    for col in required_cols:
-        if col == "open_interest_chg_1w_pct":
-            continue  # Already checked above
-        if not pd.api.types.is_numeric_dtype(df_sorted[col]):
-            errors.append(f"{col}: dtype is not numeric (got {df_sorted[col].dtype})")
-            continue
-        
-        if df_sorted[col].dtype in [np.float64, np.float32]:
-            inf_mask = np.isinf(df_sorted[col])
-            inf_count = inf_mask.sum()
-            if inf_count > 0:
-                errors.append(f"{col}: found {inf_count} inf/-inf values (not allowed)")
+    # (open_interest_chg_1w_pct already checked above)
+    errors.extend(_numeric_health(df_sorted, [col for col in required_cols if col != "open_interest_chg_1w_pct"]))
     
     return errors
 
 
-def validate_exposure_shares(df: pd.DataFrame) -> list[str]:
+def validate_exposure_shares(df: pd.DataFrame, presorted: bool = False) -> list[str]:
     """
     Validate gross exposure share metrics.
     
@@ -1001,121 +1106,53 @@ def validate_exposure_shares(df: pd.DataFrame) -> list[str]:
     has_nr = "nr_gross" in df.columns and "nr_gross_share" in df.columns and "nr_gross_share_chg_1w_pp" in df.columns
     
     # Sort by market_key and report_date for validation
-    df_sorted = df.sort_values(["market_key", "report_date"]).reset_index(drop=True)
+    df_sorted = df if presorted else df.sort_values(["market_key", "report_date"]).reset_index(drop=True)
     
     # Check 2: Shares should be within [0, 1] when not NaN
-    for share_col in ["funds_gross_share", "comm_gross_share"]:
-        valid_values = df_sorted[share_col].dropna()
-        if len(valid_values) > 0:
-            out_of_range = ((valid_values < 0) | (valid_values > 1)).sum()
-            if out_of_range > 0:
-                errors.append(
-                    f"{share_col}: {out_of_range} values outside [0, 1] range "
-                    f"(min: {valid_values.min():.6f}, max: {valid_values.max():.6f})"
-                )
-    
-    if has_nr:
-        valid_nr_share = df_sorted["nr_gross_share"].dropna()
-        if len(valid_nr_share) > 0:
-            out_of_range = ((valid_nr_share < 0) | (valid_nr_share > 1)).sum()
-            if out_of_range > 0:
-                errors.append(
-                    f"nr_gross_share: {out_of_range} values outside [0, 1] range "
-                    f"(min: {valid_nr_share.min():.6f}, max: {valid_nr_share.max():.6f})"
-                )
+    # One stacked pass for all share columns; min/max only computed for failing columns
+    share_cols = ["funds_gross_share", "comm_gross_share"] + (["nr_gross_share"] if has_nr else [])
+    shares = df_sorted[share_cols].to_numpy(dtype=np.float64)
+    _, out_counts = _bounds_counts(shares, np.zeros(len(share_cols)), np.ones(len(share_cols)))
+    for j, share_col in enumerate(share_cols):
+        out_of_range = out_counts[j]
+        if out_of_range > 0:
+            errors.append(
+                f"{share_col}: {out_of_range} values outside [0, 1] range "
+                f"(min: {np.nanmin(shares[:, j]):.6f}, max: {np.nanmax(shares[:, j]):.6f})"
+            )
     
     # Check 3: pp changes should be finite (allow NaN)
-    for pp_col in ["funds_gross_share_chg_1w_pp", "comm_gross_share_chg_1w_pp"]:
-        if not pd.api.types.is_numeric_dtype(df_sorted[pp_col]):
-            errors.append(f"{pp_col}: dtype is not numeric (got {df_sorted[pp_col].dtype})")
-            continue
-        
-        if df_sorted[pp_col].dtype in [np.float64, np.float32]:
-            inf_mask = np.isinf(df_sorted[pp_col])
-            inf_count = inf_mask.sum()
-            if inf_count > 0:
-                errors.append(f"{pp_col}: found {inf_count} inf/-inf values (not allowed)")
-    
-    if has_nr:
-        if not pd.api.types.is_numeric_dtype(df_sorted["nr_gross_share_chg_1w_pp"]):
-            errors.append(f"nr_gross_share_chg_1w_pp: dtype is not numeric (got {df_sorted['nr_gross_share_chg_1w_pp'].dtype})")
-        elif df_sorted["nr_gross_share_chg_1w_pp"].dtype in [np.float64, np.float32]:
-            inf_mask = np.isinf(df_sorted["nr_gross_share_chg_1w_pp"])
-            inf_count = inf_mask.sum()
-            if inf_count > 0:
-                errors.append(f"nr_gross_share_chg_1w_pp: found {inf_count} inf/-inf values (not allowed)")
-    
-    # Check 4: If NR exists: funds_share + comm_share + nr_share close to 1.0 (tolerance 1e-6) when not NaN
+    pp_cols = ["funds_gross_share_chg_1w_pp", "comm_gross_share_chg_1w_pp"]
     if has_nr:
-        # Check rows where all three shares are not NaN
-        mask_all = (
-            df_sorted["funds_gross_share"].notna() &
-            df_sorted["comm_gross_share"].notna() &
-            df_sorted["nr_gross_share"].notna()
-        )
-        if mask_all.sum() > 0:
-            share_sum = (
-                df_sorted.loc[mask_all, "funds_gross_share"] +
-                df_sorted.loc[mask_all, "comm_gross_share"] +
-                df_sorted.loc[mask_all, "nr_gross_share"]
-            )
-            diff_from_one = np.abs(share_sum - 1.0)
-            tolerance = 1e-6
-            violations = (diff_from_one > tolerance).sum()
-            if violations > 0:
-                max_diff = diff_from_one.max()
-                errors.append(
-                    f"Exposure shares sum: {violations} rows where "
-                    f"funds_share + comm_share + nr_share != 1.0 (tolerance {tolerance}) "
-                    f"(max diff: {max_diff:.2e})"
-                )
-    else:
-        # Without NR: funds_share + comm_share should sum to 1.0
-        mask_both = (
-            df_sorted["funds_gross_share"].notna() &
-            df_sorted["comm_gross_share"].notna()
+        pp_cols.append("nr_gross_share_chg_1w_pp")
+    errors.extend(_numeric_health(df_sorted, pp_cols))
+    
+    # Check 4: funds_share + comm_share (+ nr_share if NR exists) close to 1.0 (tolerance 1e-6) when not NaN
+    # Row sums over the share slab from Check 2; NaN rows stay NaN and never exceed the tolerance
+    tolerance = 1e-6
+    diff_from_one = np.abs(shares.sum(axis=1) - 1.0)
+    over_tol = diff_from_one > tolerance
+    if over_tol.any():
+        violations = np.count_nonzero(over_tol)
+        max_diff = diff_from_one[over_tol].max()
+        share_terms = " + ".join(col.replace("_gross", "") for col in share_cols)
+        errors.append(
+            f"Exposure shares sum: {violations} rows where "
+            f"{share_terms} != 1.0 (tolerance {tolerance}) "
+            f"(max diff: {max_diff:.2e})"
         )
-        if mask_both.sum() > 0:
-            share_sum = (
-                df_sorted.loc[mask_both, "funds_gross_share"] +
-                df_sorted.loc[mask_both, "comm_gross_share"]
-            )
-            diff_from_one = np.abs(share_sum - 1.0)
-            tolerance = 1e-6
-            violations = (diff_from_one > tolerance).sum()
-            if violations > 0:
-                max_diff = diff_from_one.max()
-                errors.append(
-                    f"Exposure shares sum: {violations} rows where "
-                    f"funds_share + comm_share != 1.0 (tolerance {tolerance}) "
-                    f"(max diff: {max_diff:.2e})"
-                )
     
     # Check 5: No inf/-inf in gross columns
-    for col in ["funds_gross", "comm_gross"]:
-        if not pd.api.types.is_numeric_dtype(df_sorted[col]):
-            errors.append(f"{col}: dtype is not numeric (got {df_sorted[col].dtype})")
-            continue
-        
-        if df_sorted[col].dtype in [np.float64, np.float32]:
-            inf_mask = np.isinf(df_sorted[col])
-            inf_count = inf_mask.sum()
-            if inf_count > 0:
-                errors.append(f"{col}: found {inf_count} inf/-inf values (not allowed)")
-    
-    if has_nr:
-        if not pd.api.types.is_numeric_dtype(df_sorted["nr_gross"]):
-            errors.append(f"nr_gross: dtype is not numeric (got {df_sorted['nr_gross'].dtype})")
-        elif df_sorted["nr_gross"].dtype in [np.float64, np.float32]:
-            inf_mask = np.isinf(df_sorted["nr_gross"])
-            inf_count = inf_mask.sum()
-            if inf_count > 0:
-                errors.append(f"nr_gross: found {inf_count} inf/-inf values (not allowed)")
+    errors.extend(_numeric_health(df_sorted, ["funds_gross", "comm_gross"] + (["nr_gross"] if has_nr else [])))
     
     return errors
 
 
-def validate_oi_v1_metrics(df: pd.DataFrame) -> list[str]:
+def validate_oi_v1_metrics(
+    df: pd.DataFrame,
+    presorted: bool = False,
+    first_row_mask: np.ndarray | None = None,
+) -> list[str]:
     """
     Validate OI v1 metrics (change strength, participation, flows, multi-horizon).
     
@@ -1155,7 +1192,9 @@ def validate_oi_v1_metrics(df: pd.DataFrame) -> list[str]:
         return errors  # Early return if columns are missing
     
     # Sort by market_key and report_date for validation
-    df_sorted = df.sort_values(["market_key", "report_date"]).reset_index(drop=True)
+    df_sorted = df if presorted else df.sort_values(["market_key", "report_date"]).reset_index(drop=True)
+    if first_row_mask is None or not presorted:
+        first_row_mask = _first_row_mask(df_sorted)
     
     # Check 2: pct columns are finite or NaN (no inf/-inf)
     pct_cols = [
@@ -1167,121 +1206,157 @@ def validate_oi_v1_metrics(df: pd.DataFrame) -> list[str]:
     if has_nr_oi:
         pct_cols.extend(["nr_total_pct_oi", "nr_long_flow_pct_oi", "nr_short_flow_pct_oi"])
     
-    for col in pct_cols:
-        if col not in df_sorted.columns:
-            continue
-        if not pd.api.types.is_numeric_dtype(df_sorted[col]):
-            errors.append(f"{col}: dtype is not numeric (got {df_sorted[col].dtype})")
-            continue
-        if df_sorted[col].dtype in [np.float64, np.float32]:
-            inf_mask = np.isinf(df_sorted[col])
-            inf_count = inf_mask.sum()
-            if inf_count > 0:
-                errors.append(f"{col}: found {inf_count} inf/-inf values (not allowed)")
+    errors.extend(_numeric_health(df_sorted, pct_cols))
     
     # Check 3: *_total_pct_oi in [0, 2.0] (soft upper bound, realistically <= 1.2)
     total_pct_cols = ["funds_total_pct_oi", "comm_total_pct_oi"]
     if has_nr_oi:
         total_pct_cols.append("nr_total_pct_oi")
     
-    for col in total_pct_cols:
-        if col not in df_sorted.columns:
-            continue
-        valid_values = df_sorted[col].dropna()
-        if len(valid_values) > 0:
-            negative = (valid_values < 0).sum()
-            if negative > 0:
-                errors.append(f"{col}: found {negative} negative values (must be >= 0)")
-            too_large = (valid_values > 2.0).sum()
-            if too_large > 0:
-                errors.append(f"{col}: found {too_large} values > 2.0 (soft upper bound exceeded, realistically <= 1.2)")
+    total_pct_cols = [col for col in total_pct_cols if col in df_sorted.columns]
+    total_pct = df_sorted[total_pct_cols].to_numpy(dtype=np.float64, na_value=np.nan)
+    negative_counts = _gated_counts(total_pct < 0)
+    too_large_counts = _gated_counts(total_pct > 2.0)
+    for j, col in enumerate(total_pct_cols):
+        negative = negative_counts[j]
+        if negative > 0:
+            errors.append(f"{col}: found {negative} negative values (must be >= 0)")
+        too_large = too_large_counts[j]
+        if too_large > 0:
+            errors.append(f"{col}: found {too_large} values > 2.0 (soft upper bound exceeded, realistically <= 1.2)")
     
     # Check 4: open_interest_chg_1w_pct_abs_pos_5y in [0, 1] or NaN
     if "open_interest_chg_1w_pct_abs_pos_5y" in df_sorted.columns:
-        valid_pos = df_sorted["open_interest_chg_1w_pct_abs_pos_5y"].dropna()
-        if len(valid_pos) > 0:
-            out_of_range = ((valid_pos < 0) | (valid_pos > 1)).sum()
-            if out_of_range > 0:
-                errors.append(
-                    f"open_interest_chg_1w_pct_abs_pos_5y: {out_of_range} values outside [0, 1] range "
-                    f"(min: {valid_pos.min():.6f}, max: {valid_pos.max():.6f})"
-                )
+        abs_pos = df_sorted["open_interest_chg_1w_pct_abs_pos_5y"].to_numpy(dtype=np.float64, na_value=np.nan)
+        _, out_of_range, lo, hi = _share_stats(abs_pos)
+        if out_of_range > 0:
+            errors.append(
+                f"open_interest_chg_1w_pct_abs_pos_5y: {out_of_range} values outside [0, 1] range "
+                f"(min: {lo:.6f}, max: {hi:.6f})"
+            )
     
     # Check 5: oi_chg_4w_pct, oi_chg_13w_pct, open_interest_chg_4w_pct, open_interest_chg_13w_pct finite or NaN
     trend_cols = ["oi_chg_4w_pct", "oi_chg_13w_pct", "open_interest_chg_4w_pct", "open_interest_chg_13w_pct"]
-    for col in trend_cols:
-        if col not in df_sorted.columns:
-            continue
-        if not pd.api.types.is_numeric_dtype(df_sorted[col]):
-            errors.append(f"{col}: dtype is not numeric (got {df_sorted[col].dtype})")
-            continue
-        if df_sorted[col].dtype in [np.float64, np.float32]:
-            inf_mask = np.isinf(df_sorted[col])
-            inf_count = inf_mask.sum()
-            if inf_count > 0:
-                errors.append(f"{col}: found {inf_count} inf/-inf values (not allowed)")
+    errors.extend(_numeric_health(df_sorted, trend_cols))
     
     # Check 6: WoW pp columns finite or NaN
     pp_cols = ["funds_total_pct_oi_chg_1w_pp", "comm_total_pct_oi_chg_1w_pp"]
     if has_nr_oi:
         pp_cols.append("nr_total_pct_oi_chg_1w_pp")
     
-    for col in pp_cols:
-        if col not in df_sorted.columns:
-            continue
-        if not pd.api.types.is_numeric_dtype(df_sorted[col]):
-            errors.append(f"{col}: dtype is not numeric (got {df_sorted[col].dtype})")
-            continue
-        if df_sorted[col].dtype in [np.float64, np.float32]:
-            inf_mask = np.isinf(df_sorted[col])
-            inf_count = inf_mask.sum()
-            if inf_count > 0:
-                errors.append(f"{col}: found {inf_count} inf/-inf values (not allowed)")
+    errors.extend(_numeric_health(df_sorted, pp_cols))
     
     # Check 6b: Flow columns finite or NaN
     flow_cols = ["funds_long_flow_pct_oi", "funds_short_flow_pct_oi", "comm_long_flow_pct_oi", "comm_short_flow_pct_oi"]
     if has_nr_oi:
         flow_cols.extend(["nr_long_flow_pct_oi", "nr_short_flow_pct_oi"])
     
-    for col in flow_cols:
-        if col not in df_sorted.columns:
-            continue
-        if not pd.api.types.is_numeric_dtype(df_sorted[col]):
-            errors.append(f"{col}: dtype is not numeric (got {df_sorted[col].dtype})")
-            continue
-        if df_sorted[col].dtype in [np.float64, np.float32]:
-            inf_mask = np.isinf(df_sorted[col])
-            inf_count = inf_mask.sum()
-            if inf_count > 0:
-                errors.append(f"{col}: found {inf_count} inf/-inf values (not allowed)")
+    errors.extend(_numeric_health(df_sorted, flow_cols))
     
     # Check 7: First-row NaN allowance per market_key for WoW-based columns (flows and pp)
     wow_cols = pp_cols + flow_cols  # WoW pp columns and flow columns
     for col in wow_cols:
         if col not in df_sorted.columns:
             continue
-        for market_key in df_sorted["market_key"].unique():
-            market_mask = df_sorted["market_key"] == market_key
-            market_data = df_sorted.loc[market_mask, [col, "report_date"]].sort_values("report_date")
-            
-            if len(market_data) == 0:
-                continue
-            
-            nan_mask = market_data[col].isna()
-            nan_count = nan_mask.sum()
-            
-            if nan_count > 1:
-                errors.append(
-                    f"{col}: {nan_count} NaN values for market_key '{market_key}' "
-                    f"(expected at most 1 NaN for first row)"
-                )
-            elif nan_count == 1:
-                # Check that NaN is in the first row (earliest report_date)
-                first_idx = market_data.index[0]
-                if not pd.isna(market_data.loc[first_idx, col]):
-                    errors.append(
-                        f"{col}: NaN not in first row for market_key '{market_key}' "
-                        f"(expected NaN only for first row)"
-                    )
+        errors.extend(_first_row_nan_errors(df_sorted, col, first_row_mask))
+    
+    return errors
+
+
+def validate_all(df: pd.DataFrame, max_workers: int | None = None) -> list[str]:
+    """
+    Run all metrics_weekly validations in one call.
+    
+    The frame is sorted by (market_key, report_date) once up front (skipped if
+    it already is, as build_metrics_weekly output is) and handed
+    to the order-dependent validators with presorted=True, so none of them
+    re-sorts or copies it; the per-market first-row mask is built once from
+    it and shared the same way. Validators only
+    read `df`, so they run concurrently in a thread pool (the heavy work is in
+    pandas/NumPy/Arrow kernels that release the GIL). Results are collected in
+    the original validator order, so messages are unchanged.
+    
+    Returns list of error messages.
+    """
+    errors = []
+    
+    errors.extend(validate_output_rows(df))
+    errors.extend(validate_uniqueness(df, ["market_key", "report_date"]))
+    
+    presorted = {"market_key", "report_date"}.issubset(df.columns)
+    if presorted and not _is_market_date_sorted(df):
+        df = df.sort_values(["market_key", "report_date"], kind="stable").reset_index(drop=True)
+    first_rows = _first_row_mask(df) if presorted else None
+    
+    validators = [
+        validate_pos_all,
+        validate_pos_5y,
+        validate_max_min_all,
+        validate_max_min_5y,
+        partial(validate_chg_1w, presorted=presorted, first_row_mask=first_rows),
+        partial(validate_net_metrics, presorted=presorted, first_row_mask=first_rows),
+        partial(validate_oi_metrics, presorted=presorted, first_row_mask=first_rows),
+        partial(validate_exposure_shares, presorted=presorted),
+        partial(validate_oi_v1_metrics, presorted=presorted, first_row_mask=first_rows),
+    ]
+    if max_workers is None:
+        max_workers = min(len(validators), os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for validator_errors in executor.map(lambda validator: validator(df), validators):
+            errors.extend(validator_errors)
     
     return errors
+
+
+def validate_parquet(path: str, batch_size: int = 128_000, max_workers: int | None = None) -> list[str]:
+    """
+    Run validate_all over a metrics parquet file one market at a time.
+    
+    The file is read by record batch, so only one market's rows (plus the
+    current batch) are held in memory. Every check in validate_all is either
+    row-local or scoped to a market_key, so validating per market reports the
+    same problems as validating the whole frame; sample idx positions are
+    relative to the market's rows. Requires the file to be sorted by
+    (market_key, report_date), as run_compute writes it.
+    
+    Returns list of error messages.
+    """
+    errors = []
+    pf = pq.ParquetFile(path)
+    if "market_key" not in pf.schema_arrow.names:
+        return validate_all(pf.read().to_pandas())
+    
+    seen = set()
+    pending = []
+    total_rows = 0
+    
+    def flush() -> None:
+        market = pd.concat(pending, ignore_index=True)
+        pending.clear()
+        errors.extend(validate_all(market, max_workers=max_workers))
+    
+    for batch in pf.iter_batches(batch_size=batch_size):
+        chunk = batch.to_pandas()
+        total_rows += len(chunk)
+        keys = chunk["market_key"].to_numpy()
+        # Split the batch where market_key changes (runs are contiguous in a sorted file)
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        for start, end in zip(starts, np.r_[starts[1:], len(chunk)]):
+            key = keys[start]
+            if pending and pending[0]["market_key"].iat[0] != key:
+                flush()
+            if not pending:
+                if key in seen:
+                    # Earlier per-market results were built from partial markets
+                    return [
+                        f"{path}: market_key '{key}' rows are not contiguous "
+                        f"(file must be sorted by market_key, report_date)"
+                    ]
+                seen.add(key)
+            pending.append(chunk.iloc[start:end])
+    if pending:
+        flush()
+    
+    if total_rows == 0:
+        errors.extend(validate_output_rows(pf.schema_arrow.empty_table().to_pandas()))
+    return errors
@@ -2,6 +2,8 @@ from __future__ import annotations
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
+import hashlib
+import re
 import requests
 from tenacity import retry, stop_after_attempt, wait_exponential
 
@@ -10,22 +12,94 @@ class DownloadResult:
     path: Path
     size_bytes: int
     downloaded_at_utc: str
+    sha256: str
+    etag: str = ""
+    last_modified: str = ""
+    # Server answered 304 to the conditional request: nothing was written
+    not_modified: bool = False
+
+def _range_validator(headers) -> str:
+    # If-Range needs a strong ETag or a Last-Modified date; a compressed body
+    # cannot be resumed by byte offset of the decoded stream
+    if headers.get("Content-Encoding", "identity") != "identity":
+        return ""
+    etag = headers.get("ETag", "")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return headers.get("Last-Modified", "")
 
 @retry(stop=stop_after_attempt(4), wait=wait_exponential(multiplier=1, min=1, max=10))
-def download_file(url: str, out_path: Path, timeout_s: int = 60) -> DownloadResult:
+def _fetch(url: str, tmp: Path, timeout_s: int, headers: dict, state: dict):
+    """
+    One download attempt into `tmp`. `state` outlives retries: bytes already
+    written, their running sha256 and the validator of the response they came
+    from, so a retry resumes with a Range request instead of starting over.
+    """
+    if state["size"] and state["validator"]:
+        # If-Range: the server sends the whole body instead if the file changed
+        headers = {"Range": f"bytes={state['size']}-", "If-Range": state["validator"]}
+    with requests.get(url, stream=True, timeout=timeout_s, headers=headers) as r:
+        if r.status_code == 304:
+            return r
+        r.raise_for_status()
+        if r.status_code == 206:
+            # Only append a range that starts exactly where the file ends; otherwise
+            # drop the partial file and let the retry fetch the whole body
+            m = re.match(r"bytes (\d+)-", r.headers.get("Content-Range", ""))
+            if not m or int(m.group(1)) != state["size"]:
+                state["h"] = hashlib.sha256()
+                state["size"] = 0
+                state["validator"] = ""
+                raise requests.HTTPError(f"unexpected Content-Range for resumed download: {r.headers.get('Content-Range', '')!r}", response=r)
+        else:
+            state["h"] = hashlib.sha256()
+            state["size"] = 0
+            state["validator"] = _range_validator(r.headers)
+        # Copy the raw stream in 1 MiB blocks (still undoing any Content-Encoding),
+        # hashing each block while it is in cache instead of re-reading the file
+        r.raw.decode_content = True
+        with tmp.open("r+b" if state["size"] else "wb") as f:
+            f.truncate(state["size"])
+            f.seek(state["size"])
+            while chunk := r.raw.read(1024 * 1024):
+                f.write(chunk)
+                state["h"].update(chunk)
+                state["size"] += len(chunk)
+        return r
+
+def download_file(
+    url: str, out_path: Path, timeout_s: int = 60, etag: str = "", last_modified: str = ""
+) -> DownloadResult:
     out_path.parent.mkdir(parents=True, exist_ok=True)
 
-    r = requests.get(url, stream=True, timeout=timeout_s)
-    r.raise_for_status()
+    # Conditional GET when validators from a previous download are known
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
 
     tmp = out_path.with_suffix(out_path.suffix + ".tmp")
-    size = 0
-    with tmp.open("wb") as f:
-        for chunk in r.iter_content(chunk_size=1024 * 256):
-            if chunk:
-                f.write(chunk)
-                size += len(chunk)
+    state = {"h": hashlib.sha256(), "size": 0, "validator": ""}
+    r = _fetch(url, tmp, timeout_s, headers, state)
+    ts = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    if r.status_code == 304:
+        return DownloadResult(
+            path=out_path,
+            size_bytes=0,
+            downloaded_at_utc=ts,
+            sha256="",
+            etag=r.headers.get("ETag", etag),
+            last_modified=r.headers.get("Last-Modified", last_modified),
+            not_modified=True,
+        )
 
     tmp.replace(out_path)
-    ts = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
-    return DownloadResult(path=out_path, size_bytes=size, downloaded_at_utc=ts)
+    return DownloadResult(
+        path=out_path,
+        size_bytes=state["size"],
+        downloaded_at_utc=ts,
+        sha256=state["h"].hexdigest(),
+        etag=r.headers.get("ETag", ""),
+        last_modified=r.headers.get("Last-Modified", ""),
+    )
@@ -1,12 +1,17 @@
 from __future__ import annotations
 from dataclasses import dataclass
 from pathlib import Path
+import csv
 import hashlib
+import mmap
+import os
+import shutil
 import pandas as pd
 
 MANIFEST_COLUMNS = [
     "dataset", "year", "url", "downloaded_at_utc",
-    "raw_path", "sha256", "size_bytes", "status", "error"
+    "raw_path", "sha256", "size_bytes", "status", "error",
+    "etag", "last_modified",
 ]
 
 @dataclass
@@ -20,21 +25,99 @@ class ManifestRow:
     size_bytes: int
     status: str
     error: str = ""
+    # HTTP validators of the downloaded content, for conditional re-fetches
+    etag: str = ""
+    last_modified: str = ""
 
 def sha256_file(path: Path) -> str:
-    h = hashlib.sha256()
     with path.open("rb") as f:
-        for chunk in iter(lambda: f.read(1024 * 1024), b""):
-            h.update(chunk)
+        # Python 3.11+: streams in C with the GIL released
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(f, "sha256").hexdigest()
+        h = hashlib.sha256()
+        if path.stat().st_size:
+            # Older Pythons: map the file and hash it in one update() call
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                h.update(mm)
     return h.hexdigest()
 
+def copy_file_sha256(src: Path, dst: Path) -> str:
+    # Like shutil.copy2, but hashes the bytes on the way through (one read pass)
+    h = hashlib.sha256()
+    buf = memoryview(bytearray(4 * 1024 * 1024))
+    with src.open("rb") as fin, dst.open("wb") as fout:
+        while n := fin.readinto(buf):
+            fout.write(buf[:n])
+            h.update(buf[:n])
+    shutil.copystat(src, dst)
+    return h.hexdigest()
+
+# Linux FICLONE ioctl (_IOW(0x94, 9, int)); fcntl does not export it before 3.12
+_FICLONE = 0x40049409
+
+def fast_copy(src: Path, dst: Path) -> None:
+    # Reflink on CoW filesystems (btrfs/XFS: no data copied), otherwise
+    # shutil.copy2, which already uses sendfile/fcopyfile in the kernel
+    try:
+        import fcntl
+        with src.open("rb") as fin, dst.open("wb") as fout:
+            fcntl.ioctl(fout.fileno(), getattr(fcntl, "FICLONE", _FICLONE), fin.fileno())
+        shutil.copystat(src, dst)
+        return
+    except (ImportError, OSError):
+        pass
+    shutil.copy2(src, dst)
+
+def manifest_parquet_path(path: Path) -> Path:
+    # Typed copy of manifest.csv for fast loads (manifest.csv -> manifest.parquet)
+    return path.with_suffix(".parquet")
+
+def _store_manifest_parquet(path: Path, df: pd.DataFrame) -> None:
+    # Best effort: a missing/stale copy only means the next load parses the CSV
+    pq_path = manifest_parquet_path(path)
+    tmp_path = pq_path.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, pq_path)
+    except OSError:
+        tmp_path.unlink(missing_ok=True)
+
 def load_manifest(path: Path) -> pd.DataFrame:
+    # CSV stays the source of truth; the parquet copy is used unless it is older
+    # (after an append or a hand edit of the CSV), in which case it is rebuilt
+    # here from the parsed CSV rather than on every append
     if path.exists():
-        return pd.read_csv(path)
+        pq_path = manifest_parquet_path(path)
+        if pq_path.exists() and pq_path.stat().st_mtime_ns > path.stat().st_mtime_ns:
+            return pd.read_parquet(pq_path)
+        df = pd.read_csv(path)
+        _store_manifest_parquet(path, df)
+        return df
     return pd.DataFrame(columns=MANIFEST_COLUMNS)
 
+def _manifest_header(path: Path) -> list[str] | None:
+    if not path.exists() or path.stat().st_size == 0:
+        return None
+    with path.open("r", newline="", encoding="utf-8") as f:
+        return next(csv.reader(f), None)
+
 def append_manifest(path: Path, row: ManifestRow) -> None:
-    df = load_manifest(path)
-    df = pd.concat([df, pd.DataFrame([row.__dict__])], ignore_index=True)
+    append_manifest_rows(path, [row])
+
+def append_manifest_rows(path: Path, rows: list[ManifestRow]) -> None:
+    if not rows:
+        return
+    header = _manifest_header(path)
+    if header is not None and header != MANIFEST_COLUMNS:
+        # Older layout: rewrite once so the file gets the current columns
+        df = load_manifest(path)
+        df = pd.concat([df, pd.DataFrame([r.__dict__ for r in rows])], ignore_index=True)
+        df.to_csv(path, index=False)
+        return
+    # Append just the new rows (header only for a new file) instead of rewriting the manifest
     path.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(path, index=False)
+    with path.open("a", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=MANIFEST_COLUMNS, lineterminator="\n")
+        if header is None:
+            writer.writeheader()
+        writer.writerows(r.__dict__ for r in rows)
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 import argparse
-import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
 
@@ -12,7 +13,7 @@ from src.common.dates import year_range
 from src.common.logging import setup_logging
 from src.common.paths import ProjectPaths
 from src.ingest.cftc_downloader import download_file
-from src.ingest.manifest import ManifestRow, append_manifest, load_manifest, sha256_file
+from src.ingest.manifest import ManifestRow, append_manifest_rows, copy_file_sha256, fast_copy, load_manifest
 
 
 def _utc_now_ts() -> str:
@@ -20,24 +21,43 @@ def _utc_now_ts() -> str:
     return datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
 
 
-def _parse_utc(s: str):
-    # robust parse; returns pandas Timestamp or NaT
-    return pd.to_datetime(s, errors="coerce", utc=True)
+MANIFEST_TS_FORMAT = "%Y-%m-%d %H:%M:%S"
 
 
-def _get_last_ok_row(manifest: pd.DataFrame, dataset: str, year: int) -> dict | None:
-    df = manifest[(manifest["dataset"] == dataset) & (manifest["year"] == year) & (manifest["status"] == "OK")]
-    if df.empty:
-        return None
+def _parse_utc(s: pd.Series) -> pd.Series:
+    # robust parse; returns UTC Timestamps or NaT. Parses each distinct string
+    # once, with the format the manifest is written in; anything else (older
+    # rows) goes through pandas' format inference
+    uniques = pd.Series(pd.unique(s), dtype=object)
+    parsed = pd.to_datetime(uniques, format=MANIFEST_TS_FORMAT, errors="coerce", utc=True)
+    retry = parsed.isna() & uniques.notna()
+    if retry.any():
+        parsed[retry] = pd.to_datetime(uniques[retry], errors="coerce", utc=True)
+    return pd.Series(pd.DatetimeIndex(parsed)[pd.Index(uniques).get_indexer(s)], index=s.index)
+
 
-    ts = _parse_utc(df["downloaded_at_utc"])
-    if ts.isna().all():
-        # fallback: last row as it appears
-        row = df.iloc[-1]
-        return row.to_dict()
+def _latest_rows(manifest: pd.DataFrame, statuses: tuple[str, ...] = ("OK",)) -> dict[tuple[str, int], dict]:
+    """
+    Latest row with one of `statuses` per (dataset, year), built in one pass
+    over the manifest: the earliest row with the max downloaded_at_utc, or the
+    last row if a (dataset, year) has no parseable timestamps.
+    """
+    ok = manifest[manifest["status"].isin(statuses)]
+    ts = _parse_utc(ok["downloaded_at_utc"])
+    best: dict[tuple[str, int], tuple] = {}
+    for idx, ds, yr, t in zip(ok.index, ok["dataset"], ok["year"], ts):
+        key = (ds, int(yr))
+        cur = best.get(key)
+        # NaT never displaces a parsed timestamp; while none has parsed, later rows win
+        if cur is None or pd.isna(cur[1]) or (not pd.isna(t) and t > cur[1]):
+            best[key] = (idx, t)
+    return {key: ok.loc[idx].to_dict() for key, (idx, _) in best.items()}
 
-    idx = ts.idxmax()
-    return df.loc[idx].to_dict()
+
+def _manifest_str(row: dict | None, key: str) -> str:
+    # Manifest text field; empty for missing rows/columns and NaN (blank CSV cells)
+    v = row.get(key) if row is not None else None
+    return v if isinstance(v, str) else ""
 
 
 def _is_canonical_raw_path(dataset: str, year: int, raw_path: str) -> bool:
@@ -53,267 +73,288 @@ def _ensure_parent(path: Path) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
 
 
-def main():
-    p = argparse.ArgumentParser()
-    p.add_argument("--root", default=".", help="project root")
-    p.add_argument("--start-year", type=int, default=2016)
-    p.add_argument("--end-year", type=int, default=None)
-    p.add_argument("--log-level", default="INFO")
-    args = p.parse_args()
-
-    logger = setup_logging(args.log_level)
-    paths = ProjectPaths(Path(args.root).resolve())
-
-    cfg = yaml.safe_load((paths.configs / "markets.yaml").read_text(encoding="utf-8"))
-    url_tpl = cfg["source"]["cftc_historical_zip_url_template"]
-    dataset = cfg["source"]["dataset"]
-
-    current_year = datetime.now(timezone.utc).year
-    refresh_years = {current_year, current_year - 1}
+@dataclass(frozen=True)
+class _IngestContext:
+    paths: ProjectPaths
+    url_tpl: str
+    dataset: str
+    current_year: int
+    refresh_years: set[int]
+    last_ok: dict[tuple[str, int], dict]
+    # latest OK/UNCHANGED row: its HTTP validators describe the last OK content
+    last_checked: dict[tuple[str, int], dict]
+    logger: object
+
+
+def _error_row(ctx: _IngestContext, y: int, url: str, e: Exception) -> ManifestRow:
+    return ManifestRow(
+        dataset=ctx.dataset,
+        year=y,
+        url=url,
+        downloaded_at_utc="",
+        raw_path="",
+        sha256="",
+        size_bytes=0,
+        status="ERROR",
+        error=str(e)[:500],
+    )
+
+
+def _process_year(y: int, ctx: _IngestContext) -> ManifestRow | None:
+    """
+    Download/migrate one year and return its manifest row (None when skipped).
+    Runs in a worker thread: touches only this year's files, never the manifest.
+    """
+    paths, dataset, logger = ctx.paths, ctx.dataset, ctx.logger
+    url = ctx.url_tpl.format(year=y)
+    last_ok = ctx.last_ok.get((dataset, y))
+
+    is_historical = y < (ctx.current_year - 1)
+    is_refresh = y in ctx.refresh_years
+
+    # canonical snapshot path (new standard)
+    out_dir = paths.raw / dataset / f"{y}"
+    snap_ts = _utc_now_ts()
+    final_out = out_dir / f"deacot{y}__{snap_ts}.zip"
+
+    # -----------------------------
+    # A) HISTORICAL YEARS
+    # -----------------------------
+    if is_historical and last_ok is not None:
+        # If last OK is already canonical -> true skip-only
+        if _is_canonical_raw_path(dataset, y, str(last_ok.get("raw_path", ""))):
+            logger.info(f"[ingest] skip year={y} (historical)")
+            return None
+
+        # One-time storage migration (NO download):
+        # copy existing flat/legacy OK zip into canonical snapshot and record OK
+        try:
+            prev_rel = str(last_ok.get("raw_path", ""))
+            prev_abs = paths.root / prev_rel
+            if not prev_abs.exists():
+                logger.warning(f"[ingest] historical year={y}: last_ok.raw_path missing on disk -> will download")
+            else:
+                _ensure_parent(final_out)
+                # Byte-for-byte copy of the OK file: reuse its recorded hash
+                h = last_ok.get("sha256")
+                if isinstance(h, str) and h:
+                    fast_copy(prev_abs, final_out)
+                else:
+                    h = copy_file_sha256(prev_abs, final_out)
+                size_bytes = final_out.stat().st_size
 
-    end_year = args.end_year or current_year
-    years = year_range(args.start_year, end_year)
+                logger.info(f"[ingest] migrated year={y} -> OK snapshot={final_out.name} bytes={size_bytes}")
+                return ManifestRow(
+                    dataset=dataset,
+                    year=y,
+                    url=str(last_ok.get("url", url)),
+                    downloaded_at_utc=datetime.now(timezone.utc).strftime(MANIFEST_TS_FORMAT),
+                    raw_path=str(final_out.relative_to(paths.root)),
+                    sha256=h,
+                    size_bytes=size_bytes,
+                    status="OK",
+                    error="",
+                    etag=_manifest_str(last_ok, "etag"),
+                    last_modified=_manifest_str(last_ok, "last_modified"),
+                )
+        except Exception as e:
+            logger.error(f"[ingest] ERROR year={y} (historical migrate): {e}")
+            return _error_row(ctx, y, url, e)
 
-    manifest_path = paths.raw / "manifest.csv"
-    manifest = load_manifest(manifest_path)
+    # If historical and no OK yet -> bootstrap download (normal OK snapshot)
+    # (falls through to download section below)
 
-    for y in years:
-        url = url_tpl.format(year=y)
-        last_ok = _get_last_ok_row(manifest, dataset, y)
-
-        is_historical = y < (current_year - 1)
-        is_refresh = y in refresh_years
-
-        # canonical snapshot path (new standard)
-        out_dir = paths.raw / dataset / f"{y}"
-        snap_ts = _utc_now_ts()
-        final_out = out_dir / f"deacot{y}__{snap_ts}.zip"
-
-        # -----------------------------
-        # A) HISTORICAL YEARS
-        # -----------------------------
-        if is_historical and last_ok is not None:
-            # If last OK is already canonical -> true skip-only
-            if _is_canonical_raw_path(dataset, y, str(last_ok.get("raw_path", ""))):
-                logger.info(f"[ingest] skip year={y} (historical)")
-                continue
-
-            # One-time storage migration (NO download):
-            # copy existing flat/legacy OK zip into canonical snapshot and record OK
-            try:
-                prev_rel = str(last_ok.get("raw_path", ""))
-                prev_abs = paths.root / prev_rel
-                if not prev_abs.exists():
-                    logger.warning(f"[ingest] historical year={y}: last_ok.raw_path missing on disk -> will download")
-                else:
-                    _ensure_parent(final_out)
-                    shutil.copy2(prev_abs, final_out)
-                    h = sha256_file(final_out)
-                    size_bytes = final_out.stat().st_size
-
-                    append_manifest(
-                        manifest_path,
-                        ManifestRow(
-                            dataset=dataset,
-                            year=y,
-                            url=str(last_ok.get("url", url)),
-                            downloaded_at_utc=datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
-                            raw_path=str(final_out.relative_to(paths.root)),
-                            sha256=h,
-                            size_bytes=size_bytes,
-                            status="OK",
-                            error="",
-                        ),
-                    )
-                    manifest = load_manifest(manifest_path)
-                    logger.info(f"[ingest] migrated year={y} -> OK snapshot={final_out.name} bytes={size_bytes}")
-                    continue
-            except Exception as e:
-                append_manifest(
-                    manifest_path,
-                    ManifestRow(
-                        dataset=dataset,
-                        year=y,
-                        url=url,
-                        downloaded_at_utc="",
-                        raw_path="",
-                        sha256="",
-                        size_bytes=0,
-                        status="ERROR",
-                        error=str(e)[:500],
-                    ),
-                )
-                manifest = load_manifest(manifest_path)
-                logger.error(f"[ingest] ERROR year={y} (historical migrate): {e}")
-                continue
+    # -----------------------------
+    # B) REFRESH YEARS
+    # -----------------------------
+    if is_refresh:
+        # Always check refresh years: download temp, hash-compare vs last OK
+        tmp_path = final_out.with_suffix(final_out.suffix + ".tmp")
+        _ensure_parent(tmp_path)
 
-        # If historical and no OK yet -> bootstrap download (normal OK snapshot)
-        # (falls through to download section below)
+        try:
+            old_sha = str(last_ok.get("sha256")) if last_ok is not None else None
 
-        # -----------------------------
-        # B) REFRESH YEARS
-        # -----------------------------
-        if is_refresh:
-            # Always check refresh years: download temp, hash-compare vs last OK
-            tmp_path = final_out.with_suffix(final_out.suffix + ".tmp")
-            _ensure_parent(tmp_path)
+            # If last OK exists but is NOT canonical, we force creating a new OK snapshot
+            # to migrate into the new layout (even if sha is the same).
+            force_new_ok = last_ok is not None and not _is_canonical_raw_path(
+                dataset, y, str(last_ok.get("raw_path", ""))
+            )
 
-            try:
-                logger.info(f"[ingest] downloading year={y} url={url} -> temp={tmp_path.name}")
-                res = download_file(url, tmp_path)
+            # Conditional GET: a 304 means the last OK content is still current,
+            # so nothing is downloaded or hashed
+            validators = {}
+            if last_ok is not None and not force_new_ok:
+                checked = ctx.last_checked.get((dataset, y))
+                validators = {
+                    "etag": _manifest_str(checked, "etag"),
+                    "last_modified": _manifest_str(checked, "last_modified"),
+                }
 
-                new_sha = sha256_file(tmp_path)
-                old_sha = str(last_ok.get("sha256")) if last_ok is not None else None
+            logger.info(f"[ingest] downloading year={y} url={url} -> temp={tmp_path.name}")
+            res = download_file(url, tmp_path, **validators)
 
-                # If last OK exists but is NOT canonical, we force creating a new OK snapshot
-                # to migrate into the new layout (even if sha is the same).
-                force_new_ok = last_ok is not None and not _is_canonical_raw_path(
-                    dataset, y, str(last_ok.get("raw_path", ""))
-                )
+            new_sha = old_sha if res.not_modified else res.sha256
 
-                if (old_sha is not None) and (new_sha == old_sha) and (not force_new_ok):
-                    # UNCHANGED: keep audit link to last OK snapshot
-                    last_ok_raw_path = str(last_ok.get("raw_path", ""))
+            if (old_sha is not None) and (new_sha == old_sha) and (not force_new_ok):
+                # UNCHANGED: keep audit link to last OK snapshot
+                last_ok_raw_path = str(last_ok.get("raw_path", ""))
+                size_bytes = 0
+                try:
+                    p_abs = paths.root / last_ok_raw_path
+                    if p_abs.exists():
+                        size_bytes = p_abs.stat().st_size
+                except Exception:
                     size_bytes = 0
-                    try:
-                        p_abs = paths.root / last_ok_raw_path
-                        if p_abs.exists():
-                            size_bytes = p_abs.stat().st_size
-                    except Exception:
-                        size_bytes = 0
-
-                    append_manifest(
-                        manifest_path,
-                        ManifestRow(
-                            dataset=dataset,
-                            year=y,
-                            url=url,
-                            downloaded_at_utc=datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
-                            raw_path=last_ok_raw_path,
-                            sha256=new_sha,
-                            size_bytes=size_bytes,
-                            status="UNCHANGED",
-                            error="",
-                        ),
-                    )
-                    # delete temp snapshot (immutability: do not keep duplicate)
-                    try:
-                        tmp_path.unlink(missing_ok=True)
-                    except Exception:
-                        pass
-
-                    manifest = load_manifest(manifest_path)
-                    logger.info(f"[ingest] unchanged year={y} (same sha256) -> raw_path={last_ok_raw_path}")
-                    continue
-
-                # Different hash (or forced migration) -> commit new immutable snapshot
-                _ensure_parent(final_out)
-                tmp_path.replace(final_out)
-
-                size_bytes = final_out.stat().st_size
-                append_manifest(
-                    manifest_path,
-                    ManifestRow(
-                        dataset=dataset,
-                        year=y,
-                        url=url,
-                        downloaded_at_utc=res.downloaded_at_utc,
-                        raw_path=str(final_out.relative_to(paths.root)),
-                        sha256=new_sha,
-                        size_bytes=size_bytes,
-                        status="OK",
-                        error="",
-                    ),
-                )
-                manifest = load_manifest(manifest_path)
-                logger.info(f"[ingest] ok year={y} bytes={size_bytes} sha256={new_sha[:12]} snapshot={final_out.name}")
-                continue
 
-            except Exception as e:
-                # cleanup temp
+                # delete temp snapshot (immutability: do not keep duplicate)
                 try:
                     tmp_path.unlink(missing_ok=True)
                 except Exception:
                     pass
 
-                append_manifest(
-                    manifest_path,
-                    ManifestRow(
-                        dataset=dataset,
-                        year=y,
-                        url=url,
-                        downloaded_at_utc="",
-                        raw_path="",
-                        sha256="",
-                        size_bytes=0,
-                        status="ERROR",
-                        error=str(e)[:500],
-                    ),
-                )
-                manifest = load_manifest(manifest_path)
-                logger.error(f"[ingest] ERROR year={y} (refresh): {e}")
-                continue
-
-        # -----------------------------
-        # C) BOOTSTRAP (non-refresh years without OK)
-        # -----------------------------
-        # For years that are not in refresh window:
-        # - if no OK yet -> download and create canonical OK snapshot
-        # - if OK exists (should have been handled above for historical) -> skip
-        if last_ok is not None:
-            # non-refresh + has OK (e.g., future range) -> skip
-            logger.info(f"[ingest] skip year={y} (already OK)")
-            continue
-
-        tmp_path = final_out.with_suffix(final_out.suffix + ".tmp")
-        _ensure_parent(tmp_path)
-        try:
-            logger.info(f"[ingest] downloading year={y} url={url} -> temp={tmp_path.name}")
-            res = download_file(url, tmp_path)
-
-            new_sha = sha256_file(tmp_path)
-            _ensure_parent(final_out)
-            tmp_path.replace(final_out)
-
-            size_bytes = final_out.stat().st_size
-            append_manifest(
-                manifest_path,
-                ManifestRow(
+                reason = "HTTP 304" if res.not_modified else "same sha256"
+                logger.info(f"[ingest] unchanged year={y} ({reason}) -> raw_path={last_ok_raw_path}")
+                return ManifestRow(
                     dataset=dataset,
                     year=y,
                     url=url,
-                    downloaded_at_utc=res.downloaded_at_utc,
-                    raw_path=str(final_out.relative_to(paths.root)),
+                    downloaded_at_utc=datetime.now(timezone.utc).strftime(MANIFEST_TS_FORMAT),
+                    raw_path=last_ok_raw_path,
                     sha256=new_sha,
                     size_bytes=size_bytes,
-                    status="OK",
+                    status="UNCHANGED",
                     error="",
-                ),
+                    etag=res.etag,
+                    last_modified=res.last_modified,
+                )
+
+            # Different hash (or forced migration) -> commit new immutable snapshot
+            _ensure_parent(final_out)
+            tmp_path.replace(final_out)
+
+            size_bytes = final_out.stat().st_size
+            logger.info(f"[ingest] ok year={y} bytes={size_bytes} sha256={new_sha[:12]} snapshot={final_out.name}")
+            return ManifestRow(
+                dataset=dataset,
+                year=y,
+                url=url,
+                downloaded_at_utc=res.downloaded_at_utc,
+                raw_path=str(final_out.relative_to(paths.root)),
+                sha256=new_sha,
+                size_bytes=size_bytes,
+                status="OK",
+                error="",
+                etag=res.etag,
+                last_modified=res.last_modified,
             )
-            manifest = load_manifest(manifest_path)
-            logger.info(f"[ingest] ok year={y} bytes={size_bytes} snapshot={final_out.name}")
+
         except Exception as e:
+            # cleanup temp
             try:
                 tmp_path.unlink(missing_ok=True)
             except Exception:
                 pass
 
-            append_manifest(
-                manifest_path,
-                ManifestRow(
-                    dataset=dataset,
-                    year=y,
-                    url=url,
-                    downloaded_at_utc="",
-                    raw_path="",
-                    sha256="",
-                    size_bytes=0,
-                    status="ERROR",
-                    error=str(e)[:500],
-                ),
-            )
-            manifest = load_manifest(manifest_path)
-            logger.error(f"[ingest] ERROR year={y}: {e}")
+            logger.error(f"[ingest] ERROR year={y} (refresh): {e}")
+            return _error_row(ctx, y, url, e)
+
+    # -----------------------------
+    # C) BOOTSTRAP (non-refresh years without OK)
+    # -----------------------------
+    # For years that are not in refresh window:
+    # - if no OK yet -> download and create canonical OK snapshot
+    # - if OK exists (should have been handled above for historical) -> skip
+    if last_ok is not None:
+        # non-refresh + has OK (e.g., future range) -> skip
+        logger.info(f"[ingest] skip year={y} (already OK)")
+        return None
+
+    tmp_path = final_out.with_suffix(final_out.suffix + ".tmp")
+    _ensure_parent(tmp_path)
+    try:
+        logger.info(f"[ingest] downloading year={y} url={url} -> temp={tmp_path.name}")
+        res = download_file(url, tmp_path)
+
+        new_sha = res.sha256
+        _ensure_parent(final_out)
+        tmp_path.replace(final_out)
+
+        size_bytes = final_out.stat().st_size
+        logger.info(f"[ingest] ok year={y} bytes={size_bytes} snapshot={final_out.name}")
+        return ManifestRow(
+            dataset=dataset,
+            year=y,
+            url=url,
+            downloaded_at_utc=res.downloaded_at_utc,
+            raw_path=str(final_out.relative_to(paths.root)),
+            sha256=new_sha,
+            size_bytes=size_bytes,
+            status="OK",
+            error="",
+            etag=res.etag,
+            last_modified=res.last_modified,
+        )
+    except Exception as e:
+        try:
+            tmp_path.unlink(missing_ok=True)
+        except Exception:
+            pass
+
+        logger.error(f"[ingest] ERROR year={y}: {e}")
+        return _error_row(ctx, y, url, e)
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--root", default=".", help="project root")
+    p.add_argument("--start-year", type=int, default=2016)
+    p.add_argument("--end-year", type=int, default=None)
+    p.add_argument("--workers", type=int, default=8, help="years downloaded/hashed concurrently")
+    p.add_argument("--log-level", default="INFO")
+    args = p.parse_args()
+
+    logger = setup_logging(args.log_level)
+    paths = ProjectPaths(Path(args.root).resolve())
+
+    cfg = yaml.safe_load((paths.configs / "markets.yaml").read_text(encoding="utf-8"))
+
+    current_year = datetime.now(timezone.utc).year
+    end_year = args.end_year or current_year
+    years = year_range(args.start_year, end_year)
+
+    manifest_path = paths.raw / "manifest.csv"
+    manifest = load_manifest(manifest_path)
+    # Each year only reads its own latest rows, so one snapshot of the manifest
+    # serves the whole run (no reload between years)
+    ctx = _IngestContext(
+        paths=paths,
+        url_tpl=cfg["source"]["cftc_historical_zip_url_template"],
+        dataset=cfg["source"]["dataset"],
+        current_year=current_year,
+        refresh_years={current_year, current_year - 1},
+        last_ok=_latest_rows(manifest),
+        last_checked=_latest_rows(manifest, ("OK", "UNCHANGED")),
+        logger=logger,
+    )
+
+    # Years are independent: overlap downloads (network) and hashing (C, GIL released)
+    rows: dict[int, ManifestRow] = {}
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = {pool.submit(_process_year, y, ctx): y for y in years}
+        for fut in as_completed(futures):
+            y = futures[fut]
+            try:
+                row = fut.result()
+            except Exception as e:
+                # One failing year must not drop the rows of the others
+                logger.error(f"[ingest] ERROR year={y}: {e}")
+                row = _error_row(ctx, y, ctx.url_tpl.format(year=y), e)
+            if row is not None:
+                rows[y] = row
+
+    # Single manifest write for the whole run, rows in year order
+    append_manifest_rows(manifest_path, [rows[y] for y in sorted(rows)])
 
 
 if __name__ == "__main__":
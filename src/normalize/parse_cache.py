@@ -0,0 +1,98 @@
+"""On-disk cache of parsed annual.txt frames, shared by normalize and registry."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from src.normalize import cot_parser
+from src.normalize.cot_parser import parse_deacot_zip
+
+
+@dataclass(frozen=True)
+class CachedParse:
+    """The parts of a parse_deacot_zip result the pipelines use."""
+    df: pd.DataFrame
+    source_file: str
+
+
+def parse_cache_key(zp: Path, year: int) -> str:
+    """Zip identity (path, size, mtime), year and the parser source."""
+    h = hashlib.sha1()
+    st = zp.stat()
+    h.update(f"{zp.resolve()}|{st.st_size}|{st.st_mtime_ns}|{year}".encode())
+    h.update(Path(cot_parser.__file__).read_bytes())
+    return h.hexdigest()
+
+
+def _cache_family(zp: Path) -> str:
+    """
+    Filename prefix shared by cache entries that `zp` supersedes: older versions
+    of the same zip, and for ingest snapshots (deacot<year>__<ts>.zip) the
+    earlier snapshots of that year.
+    """
+    stem = zp.stem
+    if "__" in stem:
+        return stem.split("__", 1)[0] + "__"
+    return stem + "."
+
+
+def _project(df: pd.DataFrame, keep_column: Callable[[str], bool] | None) -> pd.DataFrame:
+    """Keep only the columns `keep_column` accepts (all columns when None)."""
+    if keep_column is None:
+        return df
+    return df[[c for c in df.columns if keep_column(c)]]
+
+
+def parse_deacot_zip_cached(
+    zp: Path, year: int, cache_dir: Path | None, keep_column: Callable[[str], bool] | None = None
+) -> CachedParse:
+    """
+    parse_deacot_zip with an uncompressed Feather v2 cache in `cache_dir`
+    (memory-mapped on read), so re-runs skip unzip + CSV parsing.
+    `cache_dir=None` parses without caching.
+
+    `keep_column` limits the returned frame to the columns it accepts; on a
+    cache hit only those are converted to pandas. The cache itself always holds
+    the full parse, as normalize and registry need different columns.
+    """
+    cache_path = cache_dir / f"{zp.stem}.{parse_cache_key(zp, year)}.feather" if cache_dir else None
+    if cache_path is not None and cache_path.exists():
+        table = feather.read_table(cache_path, memory_map=True)
+        source_file = table.schema.metadata[b"source_file"].decode("utf-8")
+        if keep_column is not None:
+            table = table.select([c for c in table.column_names if keep_column(c)])
+        return CachedParse(df=table.to_pandas(), source_file=source_file)
+
+    parsed = parse_deacot_zip(zp, year)
+    result = CachedParse(df=parsed.df, source_file=str(parsed.source_file))
+    projected = CachedParse(df=_project(result.df, keep_column), source_file=result.source_file)
+    if cache_path is None:
+        return projected
+
+    try:
+        table = pa.Table.from_pandas(result.df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        # Mixed-type object columns Arrow cannot store: just don't cache
+        return projected
+    metadata = dict(table.schema.metadata or {})
+    metadata[b"source_file"] = result.source_file.encode("utf-8")
+    table = table.replace_schema_metadata(metadata)
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+    feather.write_feather(table, tmp_path, compression="uncompressed")
+    os.replace(tmp_path, cache_path)
+    # Drop entries for older versions of this zip / the parser and, for
+    # snapshots, for superseded snapshots of the same year
+    for old in cache_dir.glob(f"{_cache_family(zp)}*.feather"):
+        if old != cache_path:
+            old.unlink(missing_ok=True)
+    return projected
@@ -1,17 +1,34 @@
 from __future__ import annotations
 
 import argparse
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import repeat
 from pathlib import Path
 
 import yaml
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 
 from src.common.paths import ProjectPaths
 from src.common.logging import setup_logging
-from src.normalize.cot_parser import parse_deacot_zip
+from src.normalize.parse_cache import parse_deacot_zip_cached
 from src.normalize.qa_checks import qa_uniqueness, qa_nulls, qa_open_interest
 
 
+def _contains_any(values: pd.Series, terms: list[str]) -> pd.Series:
+    """True where `values` contains any of the plain-text `terms` (not regexes)."""
+    if not terms:
+        return pd.Series(False, index=values.index)
+    # Escaped, so metacharacters in market names match literally whatever the
+    # regex engine (RE2 for Arrow strings); one alternation = one pass
+    return values.str.contains("|".join(re.escape(t) for t in terms), na=False)
+
+
 def _normalize_market_filter(df: pd.DataFrame, cfg_market: dict) -> pd.DataFrame:
     # Legacy files typically contain "Market and Exchange Names"
     name_col_candidates = [c for c in df.columns if "Market" in c and "Name" in c]
@@ -19,34 +36,180 @@ def _normalize_market_filter(df: pd.DataFrame, cfg_market: dict) -> pd.DataFrame
         raise ValueError("Cannot find market name column in legacy file.")
     name_col = name_col_candidates[0]
 
-    market_name = df[name_col].astype(str)
+    # Arrow-backed strings: the .str ops below run as Arrow kernels instead of
+    # per-element Python calls on object dtype
+    market_name = df[name_col].astype("string[pyarrow]")
 
-    # crude split into name/exchange if " - " exists
-    parts = market_name.str.split(" - ", n=1, expand=True)
+    # crude split into name/exchange if " - " exists (partition: exchange is ""
+    # when there is no separator)
+    parts = market_name.str.partition(" - ")
     mkt = parts[0].str.upper()
-    ex = parts[1].fillna("").str.upper()
+    ex = parts[2].str.upper()
 
     any_of = [s.upper() for s in cfg_market["match"]["any_of"]]
     ex_any = [s.upper() for s in cfg_market["match"]["exchange_any_of"]]
 
-    cond_name = False
-    for s in any_of:
-        cond_name = cond_name | mkt.str.contains(s, na=False)
-
-    cond_ex = False
-    for s in ex_any:
-        cond_ex = cond_ex | ex.str.contains(s, na=False)
+    # One alternation per column instead of a contains() pass per term; terms
+    # are matched as plain substrings
+    cond_name = _contains_any(mkt, any_of)
+    cond_ex = _contains_any(ex, ex_any)
+
+    mask = cond_name & cond_ex
+    # assign() returns a new frame: no separate .copy() of the filtered rows
+    return df[mask].assign(_market_name=mkt[mask], _exchange_name=ex[mask])
+
+
+# MVP: keep only target contracts (prevents cross-rate markets creating duplicates)
+# Verified from your deacot2023.zip annual.txt output:
+# EUR: 099741 (EURO FX - CME)
+# JPY: 097741 (JAPANESE YEN - CME)
+# GBP: 096742 (BRITISH POUND - CME)
+# GOLD: 088691 (GOLD - COMEX)
+KEEP_CONTRACT_CODES = {
+    "EUR": "099741",
+    "JPY": "097741",
+    "GBP": "096742",
+    "GOLD": "088691",
+}
+
+# Canonical parquet is streamed out in slices of this many rows (one row group
+# each), so only one slice is converted to Arrow at a time
+CANONICAL_ROW_GROUP_SIZE = 64_000
+
+
+def _write_canonical(canonical: pd.DataFrame, out_path: Path) -> None:
+    """Write canonical slice by slice via ParquetWriter (temp file + rename)."""
+    tmp_path = out_path.with_suffix(".parquet.tmp")
+    writer = None
+    try:
+        for start in range(0, len(canonical), CANONICAL_ROW_GROUP_SIZE):
+            chunk = canonical.iloc[start:start + CANONICAL_ROW_GROUP_SIZE]
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(
+                    tmp_path,
+                    table.schema,
+                    compression="zstd",
+                    compression_level=3,
+                    use_dictionary=True,
+                    data_page_size=1 << 20,
+                )
+            else:
+                table = table.cast(writer.schema)
+            writer.write_table(table, row_group_size=CANONICAL_ROW_GROUP_SIZE)
+    finally:
+        if writer is not None:
+            writer.close()
+    os.replace(tmp_path, out_path)
+
+
+@lru_cache(maxsize=256)
+def _find_column(columns: tuple[str, ...], col_contains: str) -> str | None:
+    """
+    First column whose name contains `col_contains` (case-insensitive).
+    Cached per header: annual.txt layouts repeat across years, so later zips
+    with the same header skip the scan.
+    """
+    needle = col_contains.lower()
+    return next((c for c in columns if needle in c.lower()), None)
+
+
+def _normalize_one_zip(zp: Path, markets: list[dict], cache_dir: Path | None = None) -> tuple[list[pd.DataFrame], list[str]]:
+    """
+    Normalize one deacot<year>.zip into per-market frames.
+
+    Module-level and logger-free so it can run in a worker process: returns
+    (frames, warning messages).
+    """
+    frames = []
+    messages = []
+    year = int(zp.stem.replace("deacot", ""))
+    parsed = parse_deacot_zip_cached(zp, year, cache_dir)
+    df = parsed.df
+
+    # Detect columns for Noncommercial positions & OI (names vary slightly)
+    columns = tuple(df.columns)
+
+    def pick(col_contains: str) -> str:
+        col = _find_column(columns, col_contains)
+        if col is None:
+            raise ValueError(f"Missing column contains='{col_contains}' in {zp.name}")
+        return col
+
+    # --- Report date column (different legacy variants) ---
+    if any("As of Date in Form YYYY-MM-DD" in c for c in df.columns):
+        col_report_date = pick("As of Date in Form YYYY-MM-DD")
+    elif any("Report Date" in c for c in df.columns):
+        col_report_date = pick("Report Date")
+    else:
+        # fallback (exists in your annual.txt)
+        col_report_date = pick("As of Date in Form YYMMDD")
+
+    # --- Filter to our 4 target contracts by contract market code ---
+    col_contract_code = pick("CFTC Contract Market Code")
+    # Zero-pad with Arrow's lpad kernel instead of per-row str.zfill (the two only
+    # differ for a leading sign, which no kept contract code has)
+    codes = df[col_contract_code]
+    if not pd.api.types.is_integer_dtype(codes):
+        codes = codes.astype(str)
+    codes = pc.cast(pa.array(codes, from_pandas=True), pa.string())
+    df[col_contract_code] = pd.Series(pc.utf8_lpad(codes, width=6, padding="0").to_pandas(), index=df.index)
+
+    allowed = set(KEEP_CONTRACT_CODES.values())
+    df = df[df[col_contract_code].isin(allowed)]
+
+    # If after filter nothing left -> skip this zip (should not happen normally)
+    if df.empty:
+        messages.append(f"[normalize] {zp.name}: no rows after contract-code filter")
+        return frames, messages
+
+    # Other required columns
+    col_oi = pick("Open Interest")
+    col_nc_long = pick("Noncommercial Positions-Long")
+    col_nc_short = pick("Noncommercial Positions-Short")
+    col_nc_sprd = [c for c in df.columns if "Noncommercial" in c and "Spreading" in c]
+    col_nc_sprd = col_nc_sprd[0] if col_nc_sprd else None
+
+    # Numeric casts once per zip (one block), not once per market below
+    num_cols = list(dict.fromkeys(c for c in (col_oi, col_nc_long, col_nc_short, col_nc_sprd) if c))
+    converted = df[num_cols].apply(pd.to_numeric, errors="coerce")
+    # Parse report_date (kept as datetime64: no per-row Python date objects;
+    # parquet stores it as a timestamp column)
+    converted[col_report_date] = pd.to_datetime(df[col_report_date])
+    # One assign() on the filtered rows instead of .copy() + in-place writes
+    df = df.assign(**converted)
+
+    # Filter + map for each market in config (now df already contains only the 4 target contracts)
+    for m in markets:
+        sub = _normalize_market_filter(df, m)
+        if sub.empty:
+            continue
 
-    out = df[cond_name & cond_ex].copy()
-    out["_market_name"] = mkt[cond_name & cond_ex]
-    out["_exchange_name"] = ex[cond_name & cond_ex]
-    return out
+        out = pd.DataFrame({
+            "market_key": m["key"],
+            "market_name": sub["_market_name"].astype(str),
+            "exchange_name": sub["_exchange_name"].astype(str),
+            "report_date": sub[col_report_date],
+            "open_interest_all": sub[col_oi],
+            "nc_long": sub[col_nc_long],
+            "nc_short": sub[col_nc_short],
+            "nc_spreading": sub[col_nc_sprd] if col_nc_sprd else 0.0,
+            "raw_source_year": year,
+            "raw_source_file": parsed.source_file,
+            # Net built with the frame (same column order) rather than inserted after
+            "nc_net": sub[col_nc_long] - sub[col_nc_short],
+        })
+        frames.append(out)
+
+    return frames, messages
 
 
 def main():
     p = argparse.ArgumentParser()
     p.add_argument("--root", default=".")
     p.add_argument("--log-level", default="INFO")
+    p.add_argument("--workers", type=int, default=None, help="processes parsing raw zips (default: CPU count, 1 = sequential)")
+    p.add_argument("--no-cache", action="store_true", help="Always re-parse raw zips, ignoring the parse cache")
     args = p.parse_args()
 
     logger = setup_logging(args.log_level)
@@ -60,89 +223,31 @@ def main():
     if not zips:
         raise SystemExit(f"No raw zips found in {raw_dir}")
 
-    frames = []
+    # Parsed annual.txt frames are cached per zip (shared with the registry build)
+    cache_dir = None if args.no_cache else paths.cache
 
-    # MVP: keep only target contracts (prevents cross-rate markets creating duplicates)
-    # Verified from your deacot2023.zip annual.txt output:
-    # EUR: 099741 (EURO FX - CME)
-    # JPY: 097741 (JAPANESE YEN - CME)
-    # GBP: 096742 (BRITISH POUND - CME)
-    # GOLD: 088691 (GOLD - COMEX)
-    KEEP_CONTRACT_CODES = {
-        "EUR": "099741",
-        "JPY": "097741",
-        "GBP": "096742",
-        "GOLD": "088691",
-    }
-
-    for zp in zips:
-        year = int(zp.stem.replace("deacot", ""))
-        parsed = parse_deacot_zip(zp, year)
-        df = parsed.df
-
-        # Detect columns for Noncommercial positions & OI (names vary slightly)
-        def pick(col_contains: str) -> str:
-            cands = [c for c in df.columns if col_contains.lower() in c.lower()]
-            if not cands:
-                raise ValueError(f"Missing column contains='{col_contains}' in {zp.name}")
-            return cands[0]
-
-        # --- Report date column (different legacy variants) ---
-        if any("As of Date in Form YYYY-MM-DD" in c for c in df.columns):
-            col_report_date = pick("As of Date in Form YYYY-MM-DD")
-        elif any("Report Date" in c for c in df.columns):
-            col_report_date = pick("Report Date")
-        else:
-            # fallback (exists in your annual.txt)
-            col_report_date = pick("As of Date in Form YYMMDD")
-
-        # --- Filter to our 4 target contracts by contract market code ---
-        col_contract_code = pick("CFTC Contract Market Code")
-        df[col_contract_code] = df[col_contract_code].astype(str).str.zfill(6)
-
-        allowed = set(KEEP_CONTRACT_CODES.values())
-        df = df[df[col_contract_code].isin(allowed)].copy()
-
-        # If after filter nothing left -> skip this zip (should not happen normally)
-        if df.empty:
-            logger.warning(f"[normalize] {zp.name}: no rows after contract-code filter")
-            continue
+    # Zips are independent: parse them in parallel, keep results in zip order
+    workers = min(args.workers or os.cpu_count() or 1, len(zips))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_normalize_one_zip, zips, repeat(cfg["markets"]), repeat(cache_dir), chunksize=1))
+    else:
+        results = [_normalize_one_zip(zp, cfg["markets"], cache_dir) for zp in zips]
 
-        # Other required columns
-        col_oi = pick("Open Interest")
-        col_nc_long = pick("Noncommercial Positions-Long")
-        col_nc_short = pick("Noncommercial Positions-Short")
-        col_nc_sprd = [c for c in df.columns if "Noncommercial" in c and "Spreading" in c]
-        col_nc_sprd = col_nc_sprd[0] if col_nc_sprd else None
-
-        # Parse report_date to date
-        df[col_report_date] = pd.to_datetime(df[col_report_date]).dt.date
-
-        # Filter + map for each market in config (now df already contains only the 4 target contracts)
-        for m in cfg["markets"]:
-            sub = _normalize_market_filter(df, m)
-            if sub.empty:
-                continue
-
-            out = pd.DataFrame({
-                "market_key": m["key"],
-                "market_name": sub["_market_name"].astype(str),
-                "exchange_name": sub["_exchange_name"].astype(str),
-                "report_date": sub[col_report_date],
-                "open_interest_all": pd.to_numeric(sub[col_oi], errors="coerce"),
-                "nc_long": pd.to_numeric(sub[col_nc_long], errors="coerce"),
-                "nc_short": pd.to_numeric(sub[col_nc_short], errors="coerce"),
-                "nc_spreading": pd.to_numeric(sub[col_nc_sprd], errors="coerce") if col_nc_sprd else 0.0,
-                "raw_source_year": year,
-                "raw_source_file": parsed.source_file,
-            })
-            out["nc_net"] = out["nc_long"] - out["nc_short"]
-            frames.append(out)
+    frames = []
+    for zip_frames, messages in results:
+        for msg in messages:
+            logger.warning(msg)
+        frames.extend(zip_frames)
 
     if not frames:
         raise SystemExit("No rows produced during normalization (frames empty). Check raw files & filters.")
 
     canonical = pd.concat(frames, ignore_index=True)
+    # A handful of market keys repeated per row: categorical once (sorted
+    # categories, so the sort order is unchanged); QA can read the key set from
+    # .cat.categories and parquet stores the column dictionary-encoded
+    canonical["market_key"] = canonical["market_key"].astype("category")
     canonical = canonical.sort_values(["market_key", "report_date"]).reset_index(drop=True)
 
     # QA
@@ -161,7 +266,7 @@ def main():
 
     out_path = paths.canonical / "cot_weekly_canonical.parquet"
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    canonical.to_parquet(out_path, index=False)
+    _write_canonical(canonical, out_path)
     logger.info(f"[normalize] wrote {out_path} rows={len(canonical)}")
 
 
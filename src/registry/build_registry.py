@@ -1,186 +1,281 @@
 from __future__ import annotations
 
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import List, Dict
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+from pandas.api.types import union_categoricals
 
 from src.ingest.manifest import load_manifest
-from src.normalize.cot_parser import parse_deacot_zip
-from src.common.contract_codes import normalize_contract_code, is_valid_contract_code
+from src.normalize.parse_cache import parse_deacot_zip_cached
+from src.common.contract_codes import normalize_contract_codes, count_invalid_contract_codes
 
+# Timestamp shape written by ingest (MANIFEST_TS_FORMAT)
+MANIFEST_TS_PATTERN = r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}"
 
-def build_registry(manifest_path: Path, dataset: str, root: Path, logger) -> pd.DataFrame:
+
+def _is_registry_column(name: str) -> bool:
+    """annual.txt columns the registry reads (any "As of Date" variant)."""
+    return name in ("CFTC Contract Market Code", "Market and Exchange Names") or "As of Date" in name
+
+
+def _combine_contracts(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Reduce contract rows to one row per contract_code (categorical).
+    
+    first_seen_report_date is the min, last_seen_report_date the max,
+    market_and_exchange_name comes from the row with the latest
+    last_seen_report_date (first such row in input order, as idxmax picks),
+    fallback_name is the first non-null one in input order and rows is summed.
+    Output has the input's columns, and the reduction is associative: per-
+    snapshot partials combined in snapshot order give the same result as all
+    rows at once.
+    """
+    if df.empty:
+        return df
+    # One stable sort by (contract_code, last_seen desc): the first row of each
+    # contract block is its latest report
+    ordered = df.sort_values(["contract_code", "last_seen_report_date"], ascending=[True, False], kind="stable")
+    code_ids = ordered["contract_code"].cat.codes.to_numpy()
+    starts = np.flatnonzero(np.r_[True, code_ids[1:] != code_ids[:-1]])
+    
+    # First non-null fallback name per contract (input order), by category code
+    named = df[df["fallback_name"].notna()].drop_duplicates("contract_code")
+    fallback = np.full(len(df["contract_code"].cat.categories), np.nan, dtype=object)
+    fallback[named["contract_code"].cat.codes.to_numpy()] = named["fallback_name"].to_numpy()
+    
+    return pd.DataFrame({
+        "contract_code": ordered["contract_code"].array[starts],
+        "first_seen_report_date": np.minimum.reduceat(ordered["first_seen_report_date"].to_numpy(), starts),
+        "last_seen_report_date": ordered["last_seen_report_date"].to_numpy()[starts],
+        "market_and_exchange_name": ordered["market_and_exchange_name"].array[starts],
+        "fallback_name": fallback[code_ids[starts]],
+        "rows": np.add.reduceat(ordered["rows"].to_numpy(), starts),
+    })
+
+
+def _process_one_snapshot(snapshot: dict) -> tuple[pd.DataFrame | None, list[tuple[str, str]]]:
+    """
+    Extract contract rows from one snapshot zip, aggregated per contract.
+    
+    Module-level and logger-free so it can run in a worker process: returns
+    (per-contract partial aggregate (see _combine_contracts) or None if
+    skipped, [(log level, message), ...]).
+    """
+    zp = snapshot["raw_path"]
+    messages = [("info", f"[registry] reading zip: {zp.name}")]
+    
+    try:
+        # Only the registry columns are converted out of the parse cache
+        parsed = parse_deacot_zip_cached(zp, snapshot["year"], snapshot["cache_dir"], keep_column=_is_registry_column)
+        df = parsed.df
+        
+        # Extract required columns
+        col_contract_code = "CFTC Contract Market Code"
+        col_market_exchange = "Market and Exchange Names"
+        
+        # Report date column: priority YYYY-MM-DD, fallback YYMMDD
+        if "As of Date in Form YYYY-MM-DD" in df.columns:
+            col_report_date = "As of Date in Form YYYY-MM-DD"
+        else:
+            # Fallback: YYMMDD (as per CR-002)
+            col_report_date_candidates = [c for c in df.columns if "As of Date" in c and "YYMMDD" in c]
+            if col_report_date_candidates:
+                col_report_date = col_report_date_candidates[0]
+            else:
+                messages.append(("warning", f"[registry] {zp.name}: no report date column found, skipping"))
+                return None, messages
+        
+        # Check required columns exist
+        required_cols = [col_contract_code, col_market_exchange, col_report_date]
+        missing = [c for c in required_cols if c not in df.columns]
+        if missing:
+            messages.append(("warning", f"[registry] {zp.name}: missing columns {missing}, skipping"))
+            return None, messages
+        
+        # Extract and normalize
+        contract_df = pd.DataFrame({
+            "contract_code": normalize_contract_codes(df[col_contract_code]),
+            "market_and_exchange_name": df[col_market_exchange].astype(str),
+            # datetime64 for the aggregation below; converted to dates on output
+            "report_date": pd.to_datetime(df[col_report_date], errors="coerce"),
+        })
+        
+        # Validate contract_code format (warn only if invalid, not based on length)
+        invalid_count = count_invalid_contract_codes(contract_df["contract_code"])
+        if invalid_count:
+            messages.append(("warning", f"[registry] {zp.name}: {invalid_count} rows with invalid contract_code format"))
+        
+        # Remove rows with invalid report_date
+        contract_df = contract_df[contract_df["report_date"].notna()]
+        
+        # Early aggregation: only one row per contract leaves the worker
+        names = contract_df["market_and_exchange_name"]
+        has_name = names.notna() & (names.astype(str).str.strip() != "")
+        partial = _combine_contracts(pd.DataFrame({
+            "contract_code": contract_df["contract_code"].astype("category"),
+            "first_seen_report_date": contract_df["report_date"],
+            "last_seen_report_date": contract_df["report_date"],
+            "market_and_exchange_name": names,
+            "fallback_name": names.where(has_name),
+            "rows": 1,
+        }))
+        return partial, messages
+        
+    except Exception as e:
+        messages.append(("warning", f"[registry] {zp.name}: error processing: {e}"))
+        return None, messages
+
+
+def build_registry(
+    manifest_path: Path, dataset: str, root: Path, logger, workers: int | None = None, cache_dir: Path | None = None
+) -> pd.DataFrame:
     """
     Build contracts registry from raw snapshots.
     
     Reads manifest, selects latest OK snapshot per year,
-    extracts contract information from annual.txt files,
+    extracts contract information from annual.txt files
+    (in `workers` processes; default: CPU count, 1 = sequential;
+    parsed frames cached in `cache_dir` when given),
     and aggregates by contract_code.
     """
     manifest = load_manifest(manifest_path)
     
     # Filter: dataset == "legacy_futures_only" and status == "OK"
     ok_filter = (manifest["dataset"] == dataset) & (manifest["status"] == "OK")
-    ok_df = manifest[ok_filter].copy()
+    ok_df = manifest[ok_filter]
     
     if ok_df.empty:
         logger.warning(f"[registry] No OK rows in manifest for dataset={dataset}")
         return pd.DataFrame()
     
-    # Parse downloaded_at_utc for latest snapshot selection
-    ok_df["_downloaded_at_utc_parsed"] = pd.to_datetime(ok_df["downloaded_at_utc"], errors="coerce", utc=True)
+    # downloaded_at_utc for latest snapshot selection. Ingest writes
+    # "YYYY-MM-DD HH:MM:SS" (UTC), which sorts lexicographically: when every
+    # value has that shape the strings are compared as-is, no datetime parsing
+    ts = ok_df["downloaded_at_utc"]
+    if not (
+        pd.api.types.is_string_dtype(ts)
+        and ts.notna().all()
+        and ts.str.fullmatch(MANIFEST_TS_PATTERN).all()
+    ):
+        ts = pd.to_datetime(ts, errors="coerce", utc=True)
+    
+    # Latest OK snapshot per year in one groupby: max timestamp (first on ties);
+    # years whose timestamps are all NaT fall back to their last row
+    has_ts = ts.notna()
+    latest_idx = ts[has_ts].groupby(ok_df["year"][has_ts]).idxmax()
+    last_idx = pd.Series(ok_df.index, index=ok_df["year"]).groupby(level=0).last()
+    idx = pd.concat([latest_idx, last_idx[~last_idx.index.isin(latest_idx.index)]]).sort_index()
+    latest = ok_df.loc[idx.to_numpy()]
+    
+    raw_paths = [
+        root / p for p in latest["raw_path"].astype(str).str.replace("\\", "/", regex=False)
+    ]
+    # One directory listing per raw dir instead of an exists() probe per year
+    listings = {}
+    for parent in {p.parent for p in raw_paths}:
+        try:
+            listings[parent] = {entry.name for entry in os.scandir(parent)}
+        except OSError:
+            listings[parent] = set()
     
-    # Group by year and select latest OK snapshot per year
     snapshots = []
-    for year, group in ok_df.groupby("year"):
-        if group["_downloaded_at_utc_parsed"].isna().all():
-            # Fallback: last row if all timestamps are NaT
-            latest_row = group.iloc[-1]
-        else:
-            idx = group["_downloaded_at_utc_parsed"].idxmax()
-            latest_row = group.loc[idx]
-        
-        raw_path_str = str(latest_row["raw_path"])
-        raw_path_normalized = raw_path_str.replace("\\", "/")
-        raw_path_abs = root / raw_path_normalized
-        
-        if not raw_path_abs.exists():
+    for year, raw_path_abs in zip(idx.index, raw_paths):
+        if raw_path_abs.name not in listings[raw_path_abs.parent]:
             logger.warning(f"[registry] year={year}: raw_path does not exist: {raw_path_abs}")
             continue
         
         snapshots.append({
             "year": int(year),
             "raw_path": raw_path_abs,
+            "cache_dir": cache_dir,
         })
     
     logger.info(f"[registry] selected {len(snapshots)} snapshots")
     
-    # Collect all contract data
-    all_contract_data = []
+    # Collect all contract data (snapshots are independent: parse them in parallel)
+    workers = min(workers or os.cpu_count() or 1, max(len(snapshots), 1))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_process_one_snapshot, snapshots, chunksize=1))
+    else:
+        results = [_process_one_snapshot(snapshot) for snapshot in snapshots]
+
+    partials = []
     total_rows_read = 0
+    for partial, messages in results:
+        for level, msg in messages:
+            getattr(logger, level)(msg)
+        if partial is not None:
+            total_rows_read += int(partial["rows"].sum())
+            partials.append(partial)
     
-    for snapshot in snapshots:
-        year = snapshot["year"]
-        zp = snapshot["raw_path"]
-        
-        try:
-            logger.info(f"[registry] reading zip: {zp.name}")
-            parsed = parse_deacot_zip(zp, year)
-            df = parsed.df
-            
-            # Extract required columns
-            col_contract_code = "CFTC Contract Market Code"
-            col_market_exchange = "Market and Exchange Names"
-            
-            # Report date column: priority YYYY-MM-DD, fallback YYMMDD
-            if "As of Date in Form YYYY-MM-DD" in df.columns:
-                col_report_date = "As of Date in Form YYYY-MM-DD"
-            else:
-                # Fallback: YYMMDD (as per CR-002)
-                col_report_date_candidates = [c for c in df.columns if "As of Date" in c and "YYMMDD" in c]
-                if col_report_date_candidates:
-                    col_report_date = col_report_date_candidates[0]
-                else:
-                    logger.warning(f"[registry] {zp.name}: no report date column found, skipping")
-                    continue
-            
-            # Check required columns exist
-            required_cols = [col_contract_code, col_market_exchange, col_report_date]
-            missing = [c for c in required_cols if c not in df.columns]
-            if missing:
-                logger.warning(f"[registry] {zp.name}: missing columns {missing}, skipping")
-                continue
-            
-            # Extract and normalize
-            contract_df = pd.DataFrame({
-                "contract_code": df[col_contract_code].apply(normalize_contract_code),
-                "market_and_exchange_name": df[col_market_exchange].astype(str),
-                "report_date": pd.to_datetime(df[col_report_date], errors="coerce").dt.date,
-            })
-            
-            # Validate contract_code format (warn only if invalid, not based on length)
-            invalid_codes = ~contract_df["contract_code"].apply(is_valid_contract_code)
-            if invalid_codes.any():
-                logger.warning(f"[registry] {zp.name}: {invalid_codes.sum()} rows with invalid contract_code format")
-            
-            # Remove rows with invalid report_date
-            contract_df = contract_df[contract_df["report_date"].notna()].copy()
-            
-            rows_count = len(contract_df)
-            total_rows_read += rows_count
-            
-            all_contract_data.append(contract_df)
-            
-        except Exception as e:
-            logger.warning(f"[registry] {zp.name}: error processing: {e}")
-            continue
-    
-    if not all_contract_data:
+    if not partials:
         logger.warning("[registry] No contract data collected")
         return pd.DataFrame()
     
-    # Concatenate all data
-    all_contracts = pd.concat(all_contract_data, ignore_index=True)
+    # Snapshots without rows (e.g. header-only annual.txt) carry categories of
+    # another dtype, which union_categoricals rejects; they add nothing anyway
+    partials = [p for p in partials if not p.empty]
+    if not partials:
+        logger.warning("[registry] No contract rows with a valid report_date")
+        return pd.DataFrame()
     
+    # Concatenate the per-snapshot partials (snapshot order); contract codes are
+    # unioned as categoricals (sorted categories) rather than concatenated,
+    # which would fall back to object
+    all_contracts = pd.concat([p.drop(columns="contract_code") for p in partials], ignore_index=True)
+    all_contracts.insert(0, "contract_code", union_categoricals([p["contract_code"] for p in partials], sort_categories=True))
     logger.info(f"[registry] total rows read: {total_rows_read}")
     
     # Aggregate by contract_code
-    logger.info(f"[registry] aggregating {len(all_contracts)} rows by contract_code")
+    logger.info(f"[registry] combining {len(all_contracts)} per-snapshot contract rows by contract_code")
+    registry = _combine_contracts(all_contracts)
+    # Dates as Arrow date32 (4-byte days, no per-row Python date objects); the
+    # CSV text is the same as with .dt.date, and run_registry converts them
+    # back to dates for the parquet
+    for col in ["first_seen_report_date", "last_seen_report_date"]:
+        registry[col] = registry[col].astype(pd.ArrowDtype(pa.date32()))
     
-    # Aggregate dates
-    registry_dates = all_contracts.groupby("contract_code", as_index=False).agg({
-        "report_date": ["min", "max"],
-    })
-    registry_dates.columns = ["contract_code", "first_seen_report_date", "last_seen_report_date"]
-    
-    # For market_and_exchange_name: take latest non-null (by max report_date)
-    # Find index of row with max report_date per contract_code
-    idx_max_date = all_contracts.groupby("contract_code")["report_date"].idxmax()
-    latest_names_df = all_contracts.loc[idx_max_date, ["contract_code", "market_and_exchange_name"]].copy()
-    
-    # For rows where name is null, find any non-null name for that contract_code
-    null_names = latest_names_df["market_and_exchange_name"].isna() | (latest_names_df["market_and_exchange_name"].astype(str).str.strip() == "")
-    if null_names.any():
-        # For contracts with null names at max date, find any non-null name
-        for idx in latest_names_df[null_names].index:
-            contract_code = latest_names_df.loc[idx, "contract_code"]
-            contract_data = all_contracts[all_contracts["contract_code"] == contract_code]
-            non_null_names = contract_data[
-                contract_data["market_and_exchange_name"].notna() & 
-                (contract_data["market_and_exchange_name"].astype(str).str.strip() != "")
-            ]
-            if not non_null_names.empty:
-                latest_names_df.loc[idx, "market_and_exchange_name"] = non_null_names["market_and_exchange_name"].iloc[0]
-    
-    # Merge dates and names
-    registry = registry_dates.merge(latest_names_df, on="contract_code", how="left")
+    # For rows where name is null, take the first non-null name seen for that
+    # contract_code
+    null_names = registry["market_and_exchange_name"].isna() | (registry["market_and_exchange_name"].astype(str).str.strip() == "")
+    fill = null_names & registry["fallback_name"].notna()
+    if fill.any():
+        registry.loc[fill, "market_and_exchange_name"] = registry.loc[fill, "fallback_name"]
+    registry = registry.drop(columns=["fallback_name", "rows"])
     
     # Add required columns
     registry["sector"] = "UNKNOWN"
     registry["market_name"] = None
     registry["exchange_name"] = None
     
-    # Ensure contract_code is normalized (already normalized, but ensure consistency)
-    registry["contract_code"] = registry["contract_code"].apply(normalize_contract_code)
+    # Back to plain strings for the published registry; ensure contract_code is
+    # normalized (already normalized, but ensure consistency)
+    registry["market_and_exchange_name"] = registry["market_and_exchange_name"].astype(str)
+    registry["contract_code"] = normalize_contract_codes(registry["contract_code"].astype(str))
     
     # Validate contract_code format (warn only if invalid, not based on length)
-    invalid_codes = ~registry["contract_code"].apply(is_valid_contract_code)
-    if invalid_codes.any():
-        logger.warning(f"[registry] {invalid_codes.sum()} contract_codes with invalid format after aggregation")
+    # One scan serves both code checks below (sorting does not change the count)
+    invalid_count = count_invalid_contract_codes(registry["contract_code"])
+    if invalid_count:
+        logger.warning(f"[registry] {invalid_count} contract_codes with invalid format after aggregation")
     
     # Sort by contract_code
     registry = registry.sort_values("contract_code").reset_index(drop=True)
     
     # QA: check contract_code validity
-    invalid_codes = ~registry["contract_code"].apply(is_valid_contract_code)
-    if invalid_codes.any():
-        logger.warning(f"[registry] {invalid_codes.sum()} contract_codes with invalid format")
+    if invalid_count:
+        logger.warning(f"[registry] {invalid_count} contract_codes with invalid format")
     
     # QA: check date range
-    invalid_dates = registry["first_seen_report_date"] > registry["last_seen_report_date"]
-    if invalid_dates.any():
-        logger.warning(f"[registry] {invalid_dates.sum()} contracts with first_seen > last_seen")
+    invalid_dates = int(np.count_nonzero(registry["first_seen_report_date"] > registry["last_seen_report_date"]))
+    if invalid_dates:
+        logger.warning(f"[registry] {invalid_dates} contracts with first_seen > last_seen")
     
     logger.info(f"[registry] registry rows: {len(registry)}")
     if len(registry) > 0:
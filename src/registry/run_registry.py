@@ -3,6 +3,9 @@ from __future__ import annotations
 import argparse
 from pathlib import Path
 
+import pyarrow as pa
+import pyarrow.compute as pc
+
 from src.common.paths import ProjectPaths
 from src.common.logging import setup_logging
 from src.registry.build_registry import build_registry
@@ -12,6 +15,8 @@ def main():
     p = argparse.ArgumentParser(description="Build contracts registry from raw snapshots")
     p.add_argument("--root", default=".", help="project root")
     p.add_argument("--log-level", default="INFO")
+    p.add_argument("--no-cache", action="store_true", help="Always re-parse snapshot zips, ignoring the parse cache")
+    p.add_argument("--workers", type=int, default=None, help="processes parsing snapshot zips (default: CPU count, 1 = sequential)")
     args = p.parse_args()
 
     logger = setup_logging(args.log_level)
@@ -25,7 +30,10 @@ def main():
         raise FileNotFoundError(f"Manifest not found: {manifest_path}")
     
     # Build registry
-    registry = build_registry(manifest_path, dataset, paths.root, logger)
+    registry = build_registry(
+        manifest_path, dataset, paths.root, logger,
+        workers=args.workers, cache_dir=None if args.no_cache else paths.cache,
+    )
     
     if registry.empty:
         raise SystemExit("Registry is empty. Check manifest and raw files.")
@@ -36,7 +44,12 @@ def main():
     
     # Write parquet (required)
     parquet_path = registry_dir / "contracts_registry.parquet"
-    registry.to_parquet(parquet_path, index=False)
+    # Seen-dates go out as datetime.date objects (one per contract), so the
+    # pandas metadata and what read_parquet returns stay as before
+    date_cols = ["first_seen_report_date", "last_seen_report_date"]
+    registry.astype(dict.fromkeys(date_cols, object)).to_parquet(
+        parquet_path, index=False, compression="zstd", use_dictionary=True
+    )
     logger.info(f"[registry] wrote parquet: {parquet_path} (rows={len(registry)})")
     
     # Write CSV (required, UTF-8)
@@ -52,9 +65,13 @@ def main():
     logger.info(f"  sector='UNKNOWN': {(registry['sector'] == 'UNKNOWN').sum()}/{len(registry)}")
     
     # Validation checks
-    invalid_contract_code = registry["contract_code"].str.len() != 6
-    if invalid_contract_code.any():
-        logger.warning(f"[registry] WARNING: {invalid_contract_code.sum()} contract_codes with len != 6")
+    # Length check as Arrow reductions: min/max of the lengths settle the
+    # common all-6 case without building a per-row boolean column
+    lengths = pc.utf8_length(pa.array(registry["contract_code"], type=pa.string(), from_pandas=True))
+    bounds = pc.min_max(lengths)
+    if lengths.null_count or bounds["min"].as_py() != 6 or bounds["max"].as_py() != 6:
+        invalid_count = pc.sum(pc.fill_null(pc.not_equal(lengths, 6), True)).as_py()
+        logger.warning(f"[registry] WARNING: {invalid_count} contract_codes with len != 6")
     else:
         logger.info(f"[registry] All contract_codes have len==6")
     